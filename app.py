@@ -12,8 +12,9 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 
-# Add current directory to Python path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No sys.path manipulation needed: Python already puts the script's
+# directory first on sys.path, so the attendance_system package and
+# web_interface module resolve directly.
 
 def run_telegram_bot():
     """Run the Telegram bot in a separate thread"""
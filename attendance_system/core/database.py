@@ -7,14 +7,45 @@ employee records, attendance tracking, and admin functions.
 
 import sqlite3
 import logging
+import threading
 from datetime import datetime, time, date, timedelta
-from typing import Optional, List, Tuple, Dict, Any
+from time import monotonic
+from typing import Optional, List, Tuple, Dict, Any, Union
 import pytz
 
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# pytz.timezone() does a registry lookup and tzfile parse; resolve it
+# once at import time and share across database instances.
+_TIMEZONE = pytz.timezone(Config.TIMEZONE)
+
+
+# Hot-path statements, hoisted so every call passes the identical SQL
+# text and hits sqlite3's per-connection prepared-statement cache.
+_SQL_IS_REGISTERED = '''
+    SELECT telegram_id FROM employees
+    WHERE telegram_id = ? AND is_active = 1
+'''
+_SQL_ATTENDANCE_STATUS = '''
+    SELECT check_in_time, check_out_time, status, is_late, is_early_checkout,
+           late_reason, early_checkout_reason
+    FROM attendance
+    WHERE telegram_id = ? AND date = ?
+'''
+_SQL_OPEN_ATTENDANCE = '''
+    SELECT id FROM attendance
+    WHERE telegram_id = ? AND date = ? AND check_out_time IS NULL
+'''
+_SQL_OPEN_ATTENDANCE_WITH_DURATION = '''
+    SELECT id,
+           CAST(ROUND((julianday(?) - julianday(check_in_time)) * 86400)
+                AS INTEGER)
+    FROM attendance
+    WHERE telegram_id = ? AND date = ? AND check_out_time IS NULL
+'''
+
 
 class AttendanceDatabase:
     """
@@ -32,13 +63,58 @@ class AttendanceDatabase:
             db_name: Database file name. Uses config default if None.
         """
         self.db_name = db_name or Config.DATABASE_NAME
-        self.timezone = pytz.timezone(Config.TIMEZONE)
+        self.timezone = _TIMEZONE
+        # Short-TTL cache for the employee roster; it is re-read by the
+        # admin reports, notification sweeps and web dashboard far more
+        # often than it changes.
+        self._employees_cache: Optional[List[Dict[str, Any]]] = None
+        self._employees_cache_expires: float = 0.0
+        # Registration lookups run on nearly every update; cache the
+        # boolean per user with a TTL (maps telegram_id -> (expires, flag))
+        self._registered_cache: Dict[int, Tuple[float, bool]] = {}
+        self._admin_cache: Dict[int, Tuple[float, bool]] = {}
+        self._admin_list_cache: Optional[List[int]] = None
+        self._admin_list_cache_expires: float = 0.0
+        self._dashboard_stats_cache: Dict[Tuple[date, str], Tuple[float, Dict[str, int]]] = {}
+        self._work_hours_cache: Dict[Tuple[int, date], Tuple[float, Tuple[str, str]]] = {}
+        # Write-through mirror of conversation_state; the DB row exists
+        # only so a pending reason survives a restart
+        self._conv_cache: Dict[int, Tuple[Optional[str], Optional[Union[str, bytes]], Optional[datetime]]] = {}
+        # Telemetry rows are buffered and flushed in batches rather
+        # than paying a commit per health probe
+        self._activity_buffer: List[Tuple[str, Optional[str], datetime]] = []
+        self._activity_lock = threading.Lock()
+        self._activity_last_flush = monotonic()
+        # One long-lived connection per thread; opening a connection
+        # per call re-parses the schema and re-negotiates locks, which
+        # dominates the cost of the small queries this class runs
+        self._local = threading.local()
         self._initialize_database()
         logger.info(f"Database initialized: {self.db_name}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """Get the calling thread's cached connection, opening it lazily."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Statements are prepared once per connection and reused;
+            # size the cache to cover this module's query set
+            conn = sqlite3.connect(self.db_name, cached_statements=256)
+            # WAL lets long admin reads (reports, exports) run alongside
+            # check-in writes instead of blocking behind them; NORMAL
+            # sync is durable enough under WAL and skips an fsync per
+            # transaction. temp_store and mmap keep sorts and page reads
+            # in memory.
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA mmap_size=268435456')
+            self._local.conn = conn
+        return conn
+
     def _initialize_database(self) -> None:
         """Initialize database schema with all required tables."""
-        with sqlite3.connect(self.db_name) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Create all tables
@@ -175,11 +251,20 @@ class AttendanceDatabase:
         """Create database indexes for better performance."""
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date)",
-            "CREATE INDEX IF NOT EXISTS idx_attendance_telegram_id ON attendance(telegram_id)",
+            # (telegram_id, date) serves both equality lookups on
+            # telegram_id and the date DESC report scan (SQLite walks the
+            # index backwards), so a separate telegram_id index is pure
+            # write overhead
+            "DROP INDEX IF EXISTS idx_attendance_telegram_id",
             "CREATE INDEX IF NOT EXISTS idx_attendance_telegram_date ON attendance(telegram_id, date)",
             "CREATE INDEX IF NOT EXISTS idx_notification_log_date ON notification_log(sent_at)",
             "CREATE INDEX IF NOT EXISTS idx_server_activity_date ON server_activity(timestamp)",
-            "CREATE INDEX IF NOT EXISTS idx_exceptional_hours_date ON exceptional_hours(telegram_id, date)"
+            "CREATE INDEX IF NOT EXISTS idx_exceptional_hours_date ON exceptional_hours(telegram_id, date)",
+            # Covering indexes for the admin report queries so date-range
+            # summaries and recent-activity lookups avoid full table scans
+            "CREATE INDEX IF NOT EXISTS idx_attendance_date_flags ON attendance(date, is_late, is_early_checkout)",
+            "CREATE INDEX IF NOT EXISTS idx_server_activity_timestamp_desc ON server_activity(timestamp DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_notification_log_sent_type ON notification_log(sent_at, notification_type)"
         ]
         
         for index_sql in indexes:
@@ -203,7 +288,7 @@ class AttendanceDatabase:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO employees 
@@ -211,7 +296,14 @@ class AttendanceDatabase:
                     VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (telegram_id, username, first_name, last_name, phone_number))
                 conn.commit()
-                
+
+                # Roster changed; drop the cached copy and mark the new
+                # registration as known-registered right away
+                self._employees_cache = None
+                self._registered_cache[telegram_id] = (
+                    monotonic() + self.REGISTERED_CACHE_TTL, True
+                )
+
                 self.log_server_activity('employee_registered', f'User {telegram_id} registered')
                 logger.info(f"Employee registered: {telegram_id} ({first_name})")
                 return True
@@ -220,24 +312,69 @@ class AttendanceDatabase:
             logger.error(f"Error registering employee {telegram_id}: {e}")
             return False
     
+    # Registration state changes rarely; 60s keeps the hot path off
+    # SQLite without letting deactivations linger noticeably.
+    REGISTERED_CACHE_TTL = 60.0
+
     def is_employee_registered(self, telegram_id: int) -> bool:
         """Check if employee is registered and active."""
+        cached = self._registered_cache.get(telegram_id)
+        if cached is not None and monotonic() < cached[0]:
+            return cached[1]
+
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT telegram_id FROM employees 
-                    WHERE telegram_id = ? AND is_active = 1
-                ''', (telegram_id,))
-                return cursor.fetchone() is not None
+                cursor.execute(_SQL_IS_REGISTERED, (telegram_id,))
+                registered = cursor.fetchone() is not None
+
+            self._registered_cache[telegram_id] = (
+                monotonic() + self.REGISTERED_CACHE_TTL, registered
+            )
+            return registered
         except Exception as e:
             logger.error(f"Error checking employee registration {telegram_id}: {e}")
             return False
     
+    def get_registration_and_status(self, telegram_id: int) -> Tuple[bool, Optional[Tuple]]:
+        """
+        Get registration state and today's attendance in one round trip.
+
+        Combines the is_employee_registered lookup and today's
+        attendance row via a LEFT JOIN so /start needs a single query.
+
+        Returns:
+            Tuple of (is_registered, status_row) where status_row matches
+            the shape returned by get_attendance_status (or None)
+        """
+        try:
+            today = datetime.now(self.timezone).date()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT e.telegram_id, a.check_in_time, a.check_out_time,
+                           a.status, a.is_late, a.is_early_checkout,
+                           a.late_reason, a.early_checkout_reason
+                    FROM employees e
+                    LEFT JOIN attendance a
+                        ON a.telegram_id = e.telegram_id AND a.date = ?
+                    WHERE e.telegram_id = ? AND e.is_active = 1
+                ''', (today, telegram_id))
+
+                row = cursor.fetchone()
+                if row is None:
+                    return False, None
+                if row[1] is None and row[3] is None:
+                    return True, None
+                return True, row[1:]
+        except Exception as e:
+            logger.error(f"Error getting registration/status for {telegram_id}: {e}")
+            return False, None
+
     def get_employee_info(self, telegram_id: int) -> Optional[Dict[str, Any]]:
         """Get employee information."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT telegram_id, username, first_name, last_name, phone_number,
@@ -262,9 +399,43 @@ class AttendanceDatabase:
             logger.error(f"Error getting employee info {telegram_id}: {e}")
             return None
     
+    def update_reminder_settings(self, settings: List[Tuple]) -> bool:
+        """
+        Update reminder settings for one or more employees.
+
+        Accepts a batch so repeated updates (e.g. an admin adjusting a
+        group) become one executemany in a single transaction instead
+        of a connect/commit per employee.
+
+        Args:
+            settings: List of (reminder_enabled, reminder_time,
+                checkout_reminder_enabled, checkout_reminder_time,
+                telegram_id) tuples
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    UPDATE employees
+                    SET reminder_enabled = ?, reminder_time = ?,
+                        checkout_reminder_enabled = ?, checkout_reminder_time = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE telegram_id = ?
+                ''', settings)
+                conn.commit()
+
+                logger.info(f"Reminder settings updated for {len(settings)} employee(s)")
+                return True
+        except Exception as e:
+            logger.error(f"Error updating reminder settings: {e}")
+            return False
+
     # Attendance Management Methods
     def check_in(self, telegram_id: int, latitude: float, longitude: float, 
-                distance: float, late_reason: Optional[str] = None) -> Tuple[bool, str, bool]:
+                distance: float, late_reason: Optional[str] = None) -> Tuple[bool, str, bool, str]:
         """
         Record employee check-in.
         
@@ -276,23 +447,20 @@ class AttendanceDatabase:
             late_reason: Reason if checking in late
             
         Returns:
-            Tuple of (success, message, is_late)
+            Tuple of (success, message, is_late, time_str)
         """
         try:
             current_time = datetime.now(self.timezone)
             current_date = current_time.date()
             
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Check if already checked in today
-                cursor.execute('''
-                    SELECT id FROM attendance 
-                    WHERE telegram_id = ? AND date = ? AND check_out_time IS NULL
-                ''', (telegram_id, current_date))
+                cursor.execute(_SQL_OPEN_ATTENDANCE, (telegram_id, current_date))
                 
                 if cursor.fetchone():
-                    return False, "You are already checked in today!", False
+                    return False, "You are already checked in today!", False, ""
                 
                 # Check if this is a late check-in
                 is_late = self._is_late_checkin(telegram_id, current_time)
@@ -314,17 +482,18 @@ class AttendanceDatabase:
                     activity_detail += f", Late reason: {late_reason}"
                 self.log_server_activity('check_in', activity_detail)
                 
-                message = f"Check-in successful at {current_time.strftime('%H:%M:%S')}"
+                time_str = current_time.strftime('%H:%M:%S')
+                message = f"Check-in successful at {time_str}"
                 logger.info(f"Employee {telegram_id} checked in - {activity_detail}")
-                
-                return True, message, is_late
-                
+
+                return True, message, is_late, time_str
+
         except Exception as e:
             logger.error(f"Error during check-in for {telegram_id}: {e}")
-            return False, f"Check-in failed: {str(e)}", False
+            return False, f"Check-in failed: {str(e)}", False, ""
     
     def check_out(self, telegram_id: int, latitude: float, longitude: float, 
-                 distance: float, early_reason: Optional[str] = None) -> Tuple[bool, str, bool]:
+                 distance: float, early_reason: Optional[str] = None) -> Tuple[bool, str, bool, str, int]:
         """
         Record employee check-out.
         
@@ -336,24 +505,23 @@ class AttendanceDatabase:
             early_reason: Reason if checking out early
             
         Returns:
-            Tuple of (success, message, is_early)
+            Tuple of (success, message, is_early, time_str, duration_seconds)
         """
         try:
             current_time = datetime.now(self.timezone)
             current_date = current_time.date()
             
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # Find today's check-in record
-                cursor.execute('''
-                    SELECT id FROM attendance 
-                    WHERE telegram_id = ? AND date = ? AND check_out_time IS NULL
-                ''', (telegram_id, current_date))
+                # Find today's check-in record; SQLite also supplies the
+                # worked duration so callers need not re-parse timestamps
+                cursor.execute(_SQL_OPEN_ATTENDANCE_WITH_DURATION,
+                               (current_time, telegram_id, current_date))
                 
                 record = cursor.fetchone()
                 if not record:
-                    return False, "You haven't checked in today or already checked out!", False
+                    return False, "You haven't checked in today or already checked out!", False, "", 0
                 
                 # Check if this is an early check-out
                 is_early = self._is_early_checkout(telegram_id, current_time)
@@ -375,14 +543,15 @@ class AttendanceDatabase:
                     activity_detail += f", Early reason: {early_reason}"
                 self.log_server_activity('check_out', activity_detail)
                 
-                message = f"Check-out successful at {current_time.strftime('%H:%M:%S')}"
+                time_str = current_time.strftime('%H:%M:%S')
+                message = f"Check-out successful at {time_str}"
                 logger.info(f"Employee {telegram_id} checked out - {activity_detail}")
-                
-                return True, message, is_early
-                
+
+                return True, message, is_early, time_str, record[1]
+
         except Exception as e:
             logger.error(f"Error during check-out for {telegram_id}: {e}")
-            return False, f"Check-out failed: {str(e)}", False
+            return False, f"Check-out failed: {str(e)}", False, "", 0
     
     def get_attendance_status(self, telegram_id: int, date_obj: Optional[date] = None) -> Optional[Tuple]:
         """Get current attendance status for a specific date."""
@@ -390,36 +559,122 @@ class AttendanceDatabase:
             if date_obj is None:
                 date_obj = datetime.now(self.timezone).date()
             
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT check_in_time, check_out_time, status, is_late, is_early_checkout,
-                           late_reason, early_checkout_reason
-                    FROM attendance 
-                    WHERE telegram_id = ? AND date = ?
-                ''', (telegram_id, date_obj))
+                cursor.execute(_SQL_ATTENDANCE_STATUS, (telegram_id, date_obj))
                 
                 return cursor.fetchone()
         except Exception as e:
             logger.error(f"Error getting attendance status for {telegram_id}: {e}")
             return None
     
+    def get_employees_for_reminders(self) -> List[Tuple[int, str, str]]:
+        """
+        Get reminder recipients for today in a single query.
+
+        Returns (telegram_id, first_name, kind) rows where kind is
+        'checkin' for employees with no attendance row today and
+        'checkout' for employees still checked in. Replaces the
+        employee-list fetch plus one status query per employee that the
+        reminder jobs used to run.
+        """
+        try:
+            today = datetime.now(self.timezone).date()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT e.telegram_id, e.first_name,
+                           CASE WHEN a.id IS NULL THEN 'checkin'
+                                ELSE 'checkout' END
+                    FROM employees e
+                    LEFT JOIN attendance a
+                        ON a.telegram_id = e.telegram_id AND a.date = ?
+                    WHERE e.is_active = 1
+                      AND (a.id IS NULL OR a.check_out_time IS NULL)
+                ''', (today,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting reminder recipients: {e}")
+            return []
+
+    def get_recent_attendance(self, telegram_id: int, days: int = 7) -> List[Tuple]:
+        """
+        Get attendance records for the last N days, newest first.
+
+        This is the weekly report's only query: one round trip over the
+        per-thread shared connection, with durations computed by SQLite.
+
+        Args:
+            telegram_id: Employee Telegram ID
+            days: Number of days to look back
+
+        Returns:
+            List of (date, check_in_time, check_out_time, is_late,
+            is_early_checkout, duration_seconds) tuples; duration_seconds
+            is NULL until the employee has checked out
+        """
+        try:
+            end_date = datetime.now(self.timezone).date()
+            start_date = end_date - timedelta(days=days - 1)
+
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT date, check_in_time, check_out_time,
+                           is_late, is_early_checkout,
+                           CAST(ROUND((julianday(check_out_time) -
+                                       julianday(check_in_time)) * 86400)
+                                AS INTEGER)
+                    FROM attendance
+                    WHERE telegram_id = ? AND date BETWEEN ? AND ?
+                    ORDER BY date DESC
+                ''', (telegram_id, start_date, end_date))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting recent attendance for {telegram_id}: {e}")
+            return []
+
+    @staticmethod
+    def _hhmm_to_seconds(hhmm: str) -> int:
+        """Convert an 'HH:MM' work-hours string to seconds since midnight.
+
+        Integer split-and-multiply; strptime's locale-aware parser is
+        overkill for this fixed two-field format and ran on every
+        check-in and check-out.
+        """
+        h, m = hhmm.split(':')
+        return int(h) * 3600 + int(m) * 60
+
     def _is_late_checkin(self, telegram_id: int, checkin_time: datetime) -> bool:
         """Check if check-in is late based on work hours."""
         work_start, _ = self.get_effective_work_hours(telegram_id, checkin_time.date())
-        work_start_time = datetime.strptime(work_start, '%H:%M').time()
-        return checkin_time.time() > work_start_time
+        checkin_seconds = (checkin_time.hour * 3600 + checkin_time.minute * 60
+                           + checkin_time.second)
+        return checkin_seconds > self._hhmm_to_seconds(work_start)
     
     def _is_early_checkout(self, telegram_id: int, checkout_time: datetime) -> bool:
         """Check if check-out is early based on work hours."""
         _, work_end = self.get_effective_work_hours(telegram_id, checkout_time.date())
-        work_end_time = datetime.strptime(work_end, '%H:%M').time()
-        return checkout_time.time() < work_end_time
+        checkout_seconds = (checkout_time.hour * 3600 + checkout_time.minute * 60
+                            + checkout_time.second)
+        return checkout_seconds < self._hhmm_to_seconds(work_end)
     
+    WORK_HOURS_CACHE_TTL = 300.0
+
     def get_effective_work_hours(self, telegram_id: int, date_obj: date) -> Tuple[str, str]:
-        """Get effective work hours (exceptional or standard)."""
+        """
+        Get effective work hours (exceptional or standard).
+
+        Hours change at most daily, but every check-in/out consults them
+        several times; cache per (employee, date) for a few minutes.
+        Granting exceptional hours invalidates the affected entry.
+        """
+        cache_key = (telegram_id, date_obj)
+        cached = self._work_hours_cache.get(cache_key)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Check for exceptional hours first
@@ -430,20 +685,25 @@ class AttendanceDatabase:
                 
                 exceptional = cursor.fetchone()
                 if exceptional:
-                    return exceptional[0], exceptional[1]
-                
-                # Get standard work hours
-                cursor.execute('''
-                    SELECT standard_work_start, standard_work_end FROM employees
-                    WHERE telegram_id = ?
-                ''', (telegram_id,))
-                
-                standard = cursor.fetchone()
-                if standard:
-                    return standard[0], standard[1]
+                    hours = (exceptional[0], exceptional[1])
+                else:
+                    # Get standard work hours
+                    cursor.execute('''
+                        SELECT standard_work_start, standard_work_end FROM employees
+                        WHERE telegram_id = ?
+                    ''', (telegram_id,))
                     
-                # Default fallback
-                return Config.DEFAULT_WORK_START, Config.DEFAULT_WORK_END
+                    standard = cursor.fetchone()
+                    if standard:
+                        hours = (standard[0], standard[1])
+                    else:
+                        # Default fallback
+                        hours = (Config.DEFAULT_WORK_START, Config.DEFAULT_WORK_END)
+            
+            self._work_hours_cache[cache_key] = (
+                monotonic() + self.WORK_HOURS_CACHE_TTL, hours
+            )
+            return hours
                 
         except Exception as e:
             logger.error(f"Error getting work hours for {telegram_id}: {e}")
@@ -453,7 +713,7 @@ class AttendanceDatabase:
     def add_admin(self, telegram_id: int, created_by: Optional[int] = None) -> bool:
         """Add a new admin."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO admins (telegram_id, created_by)
@@ -461,6 +721,9 @@ class AttendanceDatabase:
                 ''', (telegram_id, created_by))
                 conn.commit()
                 
+                # New privileges must be visible immediately
+                self._admin_cache.pop(telegram_id, None)
+                self._admin_list_cache = None
                 self.log_server_activity('admin_added', f'Admin {telegram_id} added')
                 logger.info(f"Admin added: {telegram_id}")
                 return True
@@ -468,26 +731,125 @@ class AttendanceDatabase:
             logger.error(f"Error adding admin {telegram_id}: {e}")
             return False
     
+    def get_user_flags(self, telegram_id: int) -> Tuple[bool, bool]:
+        """
+        Get registration and admin status in a single query.
+
+        Args:
+            telegram_id: Telegram user ID
+
+        Returns:
+            Tuple of (is_registered, is_admin)
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT EXISTS(SELECT 1 FROM employees
+                                  WHERE telegram_id = ? AND is_active = 1),
+                           EXISTS(SELECT 1 FROM admins
+                                  WHERE telegram_id = ?)
+                ''', (telegram_id, telegram_id))
+                registered, admin = cursor.fetchone()
+                return bool(registered), bool(admin)
+        except Exception as e:
+            logger.error(f"Error getting user flags for {telegram_id}: {e}")
+            return False, False
+
+    ADMIN_CACHE_TTL = 60.0
+
     def is_admin(self, telegram_id: int) -> bool:
-        """Check if user is admin."""
+        """Check if user is admin (cached for ADMIN_CACHE_TTL seconds)."""
+        cached = self._admin_cache.get(telegram_id)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT telegram_id FROM admins WHERE telegram_id = ?
                 ''', (telegram_id,))
-                return cursor.fetchone() is not None
+                admin = cursor.fetchone() is not None
+            self._admin_cache[telegram_id] = (
+                monotonic() + self.ADMIN_CACHE_TTL, admin
+            )
+            return admin
         except Exception as e:
             logger.error(f"Error checking admin status for {telegram_id}: {e}")
             return False
     
+    def get_status_counts(self) -> Tuple[int, int]:
+        """
+        Get active employee and admin counts in a single query.
+
+        Returns:
+            Tuple of (total_employees, total_admins)
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT (SELECT COUNT(*) FROM employees WHERE is_active = 1),
+                           (SELECT COUNT(*) FROM admins)
+                ''')
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Error getting status counts: {e}")
+            return 0, 0
+
+    def toggle_admin(self, telegram_id: int,
+                     created_by: Optional[int] = None) -> Optional[bool]:
+        """
+        Toggle admin status atomically; returns the new state.
+
+        The delete-then-insert runs in one transaction on one
+        connection, so there is no check-then-write race with another
+        request. Returns True if the user is now an admin, False if
+        their admin row was removed, None on error.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM admins WHERE telegram_id = ?',
+                               (telegram_id,))
+                if cursor.rowcount:
+                    is_now_admin = False
+                else:
+                    cursor.execute('''
+                        INSERT INTO admins (telegram_id, created_by)
+                        VALUES (?, ?)
+                    ''', (telegram_id, created_by))
+                    is_now_admin = True
+                conn.commit()
+                
+                # New privileges must be visible immediately
+                self._admin_cache.pop(telegram_id, None)
+                self._admin_list_cache = None
+                action = 'granted' if is_now_admin else 'revoked'
+                self.log_server_activity(
+                    'admin_toggled', f'Admin {action} for {telegram_id}'
+                )
+                logger.info(f"Admin {action}: {telegram_id}")
+                return is_now_admin
+        except Exception as e:
+            logger.error(f"Error toggling admin {telegram_id}: {e}")
+            return None
+
+    ADMIN_LIST_CACHE_TTL = 300.0
+
     def get_all_admins(self) -> List[int]:
-        """Get all admin IDs."""
+        """Get all admin IDs (cached for ADMIN_LIST_CACHE_TTL seconds)."""
+        if (self._admin_list_cache is not None
+                and monotonic() < self._admin_list_cache_expires):
+            return self._admin_list_cache
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT telegram_id FROM admins')
-                return [row[0] for row in cursor.fetchall()]
+                admins = [row[0] for row in cursor.fetchall()]
+                self._admin_list_cache = admins
+                self._admin_list_cache_expires = monotonic() + self.ADMIN_LIST_CACHE_TTL
+                return admins
         except Exception as e:
             logger.error(f"Error getting all admins: {e}")
             return []
@@ -498,7 +860,7 @@ class AttendanceDatabase:
                             reason: str, created_by: int) -> bool:
         """Add exceptional working hours for an employee."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO exceptional_hours
@@ -507,6 +869,8 @@ class AttendanceDatabase:
                 ''', (telegram_id, date_obj, work_start, work_end, reason, created_by))
                 conn.commit()
                 
+                # New hours take effect on the employee's next action
+                self._work_hours_cache.pop((telegram_id, date_obj), None)
                 self.log_server_activity('exceptional_hours_added', 
                                        f'Employee {telegram_id}, Date {date_obj}, Hours {work_start}-{work_end}')
                 logger.info(f"Exceptional hours added for {telegram_id} on {date_obj}")
@@ -517,11 +881,19 @@ class AttendanceDatabase:
     
     # Conversation State Management
     def set_conversation_state(self, telegram_id: int, state: str, 
-                             data: Optional[str] = None, expires_minutes: int = 30) -> None:
-        """Set conversation state for multi-step interactions."""
+                             data: Optional[Union[str, bytes]] = None,
+                             expires_minutes: int = 30) -> None:
+        """Set conversation state for multi-step interactions.
+
+        data may be text or a packed binary payload; SQLite stores
+        either as-is.
+        """
         try:
-            expires_at = datetime.now() + timedelta(minutes=expires_minutes)
-            with sqlite3.connect(self.db_name) as conn:
+            # Compute "now" once in local time; expires_at is compared
+            # against the same clock on read, avoiding the skew of
+            # SQLite's UTC-based CURRENT_TIMESTAMP
+            expires_at = datetime.now(self.timezone).replace(tzinfo=None) + timedelta(minutes=expires_minutes)
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO conversation_state 
@@ -529,20 +901,41 @@ class AttendanceDatabase:
                     VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (telegram_id, state, data, expires_at))
                 conn.commit()
+            self._conv_cache[telegram_id] = (state, data, expires_at)
         except Exception as e:
             logger.error(f"Error setting conversation state for {telegram_id}: {e}")
     
     def get_conversation_state(self, telegram_id: int) -> Tuple[Optional[str], Optional[str]]:
-        """Get conversation state."""
+        """Get conversation state.
+
+        Served from the in-process mirror on the hot path — including a
+        cached "no state" answer for the common case — and from the DB
+        only for users not seen since startup.
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            now = datetime.now(self.timezone).replace(tzinfo=None)
+            cached = self._conv_cache.get(telegram_id)
+            if cached is not None:
+                state, data, expires_at = cached
+                if state is None or expires_at is None or expires_at > now:
+                    return state, data
+                # Expired in cache; forget and re-check the DB
+                del self._conv_cache[telegram_id]
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT state, data FROM conversation_state 
-                    WHERE telegram_id = ? AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
-                ''', (telegram_id,))
+                    SELECT state, data, expires_at FROM conversation_state
+                    WHERE telegram_id = ? AND (expires_at IS NULL OR expires_at > ?)
+                ''', (telegram_id, now))
                 result = cursor.fetchone()
-                return result if result else (None, None)
+            if result:
+                state, data, expires_raw = result
+                expires_at = (datetime.fromisoformat(expires_raw)
+                              if isinstance(expires_raw, str) else expires_raw)
+                self._conv_cache[telegram_id] = (state, data, expires_at)
+                return state, data
+            self._conv_cache[telegram_id] = (None, None, None)
+            return None, None
         except Exception as e:
             logger.error(f"Error getting conversation state for {telegram_id}: {e}")
             return None, None
@@ -550,38 +943,132 @@ class AttendanceDatabase:
     def clear_conversation_state(self, telegram_id: int) -> None:
         """Clear conversation state."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM conversation_state WHERE telegram_id = ?', (telegram_id,))
                 conn.commit()
+            self._conv_cache[telegram_id] = (None, None, None)
         except Exception as e:
             logger.error(f"Error clearing conversation state for {telegram_id}: {e}")
     
     # Logging and Monitoring
     def log_notification(self, telegram_id: int, notification_type: str, 
                         message: str, delivery_status: str = 'sent') -> None:
-        """Log notification sent to database."""
+        """Log notification sent to database.
+
+        sent_at is written explicitly in local time rather than left to
+        the column's UTC CURRENT_TIMESTAMP default, so the daily counts
+        compare like with like.
+        """
+        sent_at = datetime.now(self.timezone).replace(tzinfo=None)
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO notification_log 
-                    (telegram_id, notification_type, message, delivery_status)
-                    VALUES (?, ?, ?, ?)
-                ''', (telegram_id, notification_type, message, delivery_status))
+                    (telegram_id, notification_type, message, delivery_status, sent_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (telegram_id, notification_type, message, delivery_status,
+                       sent_at))
                 conn.commit()
         except Exception as e:
             logger.error(f"Error logging notification: {e}")
     
-    def log_server_activity(self, activity_type: str, details: Optional[str] = None) -> None:
-        """Log server activity for monitoring."""
+    def log_notifications_batch(
+            self, rows: List[Tuple[int, str, str, str, datetime]]) -> None:
+        """
+        Log many notifications in one transaction.
+
+        Args:
+            rows: (telegram_id, notification_type, message,
+            delivery_status, sent_at) tuples collected over a fan-out
+            batch; sent_at is the local send time, captured when the
+            message went out rather than when the batch flushes
+        """
+        if not rows:
+            return
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO notification_log 
+                    (telegram_id, notification_type, message, delivery_status, sent_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error logging notification batch: {e}")
+
+    def get_recent_server_activity(self, limit: int = 10) -> List[Tuple]:
+        """Get the most recent server activity entries, newest first."""
+        # Make buffered telemetry visible before reading
+        self._flush_server_activity()
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO server_activity (activity_type, details)
-                    VALUES (?, ?)
-                ''', (activity_type, details))
+                    SELECT timestamp, activity_type, details
+                    FROM server_activity
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ''', (limit,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting recent server activity: {e}")
+            return []
+
+    def get_todays_notification_counts(self) -> List[Tuple[str, int]]:
+        """Get today's notification counts grouped by type."""
+        try:
+            today = datetime.now(self.timezone).date()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT notification_type, COUNT(*)
+                    FROM notification_log
+                    WHERE date(sent_at) = ?
+                    GROUP BY notification_type
+                ''', (today,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting notification counts: {e}")
+            return []
+
+    ACTIVITY_FLUSH_THRESHOLD = 20
+    ACTIVITY_FLUSH_INTERVAL = 60.0
+
+    def log_server_activity(self, activity_type: str, details: Optional[str] = None) -> None:
+        """Log server activity for monitoring.
+
+        Entries are telemetry, not critical data: they are appended to an
+        in-memory buffer and written in one executemany/commit when the
+        buffer fills or a minute has passed, instead of an fsync per probe.
+        """
+        timestamp = datetime.now(self.timezone).replace(tzinfo=None)
+        with self._activity_lock:
+            self._activity_buffer.append((activity_type, details, timestamp))
+            flush_due = (
+                len(self._activity_buffer) >= self.ACTIVITY_FLUSH_THRESHOLD
+                or monotonic() - self._activity_last_flush >= self.ACTIVITY_FLUSH_INTERVAL
+            )
+        if flush_due:
+            self._flush_server_activity()
+
+    def _flush_server_activity(self) -> None:
+        """Write buffered activity rows in a single transaction."""
+        with self._activity_lock:
+            batch = self._activity_buffer
+            if not batch:
+                return
+            self._activity_buffer = []
+            self._activity_last_flush = monotonic()
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO server_activity (activity_type, details, timestamp)
+                    VALUES (?, ?, ?)
+                ''', batch)
                 conn.commit()
         except Exception as e:
             logger.error(f"Error logging server activity: {e}")
@@ -593,26 +1080,25 @@ class AttendanceDatabase:
             date_obj = datetime.now(self.timezone).date()
         
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # Get total employees
-                cursor.execute('SELECT COUNT(*) FROM employees WHERE is_active = 1')
-                total_employees = cursor.fetchone()[0]
-                
-                # Get attendance stats
+                # Fetch employee count and attendance stats in one round trip
                 cursor.execute('''
-                    SELECT 
+                    SELECT
+                        (SELECT COUNT(*) FROM employees WHERE is_active = 1) as total_employees,
                         COUNT(*) as checked_in,
                         SUM(CASE WHEN check_out_time IS NOT NULL THEN 1 ELSE 0 END) as checked_out,
                         SUM(CASE WHEN is_late = 1 THEN 1 ELSE 0 END) as late_checkins,
                         SUM(CASE WHEN is_early_checkout = 1 THEN 1 ELSE 0 END) as early_checkouts
-                    FROM attendance 
+                    FROM attendance
                     WHERE date = ?
                 ''', (date_obj,))
-                
-                stats = cursor.fetchone()
-                
+
+                row = cursor.fetchone()
+                total_employees = row[0]
+                stats = row[1:]
+
                 return {
                     'date': date_obj,
                     'total_employees': total_employees,
@@ -627,12 +1113,70 @@ class AttendanceDatabase:
             logger.error(f"Error getting daily summary: {e}")
             return {}
     
+    def get_weekly_summary(self, end_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Get attendance summary for the last 7 days.
+
+        The daily breakdown and the totals are computed in a single SQL
+        query (UNION ALL with a totals row) so no Python-side accumulation
+        is needed and the approach scales to longer ranges.
+
+        Args:
+            end_date: Last day of the range. Defaults to today.
+
+        Returns:
+            Dict with 'days' (list of per-day stats) and 'totals'
+        """
+        if end_date is None:
+            end_date = datetime.now(self.timezone).date()
+        start_date = end_date - timedelta(days=6)
+
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT date, COUNT(*) as checkins,
+                           SUM(is_late = 1) as late,
+                           SUM(is_early_checkout = 1) as early
+                    FROM attendance WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                    UNION ALL
+                    SELECT 'TOTAL', COUNT(*),
+                           SUM(is_late = 1),
+                           SUM(is_early_checkout = 1)
+                    FROM attendance WHERE date BETWEEN ? AND ?
+                ''', (start_date, end_date, start_date, end_date))
+
+                rows = cursor.fetchall()
+                totals = rows[-1] if rows else ('TOTAL', 0, 0, 0)
+                days = [
+                    {'date': row[0], 'checkins': row[1],
+                     'late': row[2], 'early': row[3]}
+                    for row in rows[:-1]
+                ]
+
+                return {
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'days': days,
+                    'totals': {
+                        'checkins': totals[1] or 0,
+                        'late': totals[2] or 0,
+                        'early': totals[3] or 0,
+                        'avg_checkins': (totals[1] or 0) / 7
+                    }
+                }
+
+        except Exception as e:
+            logger.error(f"Error getting weekly summary: {e}")
+            return {}
+
     def cleanup_old_data(self, days_to_keep: int = 90) -> None:
         """Clean up old data to maintain database performance."""
         try:
             cutoff_date = datetime.now().date() - timedelta(days=days_to_keep)
             
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Clean old notification logs
@@ -649,9 +1193,9 @@ class AttendanceDatabase:
                 
                 # Clean expired conversation states
                 cursor.execute('''
-                    DELETE FROM conversation_state 
-                    WHERE expires_at < CURRENT_TIMESTAMP
-                ''', )
+                    DELETE FROM conversation_state
+                    WHERE expires_at < ?
+                ''', (datetime.now(self.timezone).replace(tzinfo=None),))
                 
                 conn.commit()
                 logger.info(f"Database cleanup completed - removed data older than {cutoff_date}")
@@ -660,10 +1204,17 @@ class AttendanceDatabase:
             logger.error(f"Error during database cleanup: {e}") 
     
     # Web Interface Support Methods
+    # Roster cache TTL in seconds; short enough that admin views stay
+    # effectively live, long enough to absorb bursts of report requests.
+    EMPLOYEES_CACHE_TTL = 5.0
+
     def get_all_employees(self) -> List[Dict[str, Any]]:
         """Get all registered employees for web interface."""
+        if self._employees_cache is not None and monotonic() < self._employees_cache_expires:
+            return self._employees_cache
+
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT telegram_id, username, first_name, last_name, phone_number,
@@ -672,8 +1223,11 @@ class AttendanceDatabase:
                     ORDER BY first_name, last_name
                 ''')
                 
+                # Iterate the cursor directly; sqlite3 then streams rows
+                # in arraysize batches instead of materializing an
+                # intermediate list of tuples alongside the dicts
                 employees = []
-                for row in cursor.fetchall():
+                for row in cursor:
                     employees.append({
                         'telegram_id': row[0],
                         'username': row[1],
@@ -683,19 +1237,105 @@ class AttendanceDatabase:
                         'is_active': bool(row[5]),
                         'created_at': row[6]
                     })
-                
+
+                self._employees_cache = employees
+                self._employees_cache_expires = monotonic() + self.EMPLOYEES_CACHE_TTL
                 return employees
-                
+
         except Exception as e:
             logger.error(f"Error getting all employees: {e}")
             return []
     
-    def get_daily_attendance_records(self, date_obj: date) -> List[Dict[str, Any]]:
-        """Get all attendance records for a specific date for web interface."""
+    DASHBOARD_STATS_CACHE_TTL = 10.0
+
+    def get_dashboard_stats(self, date_obj: date,
+                            late_cutoff: str = '09:30:00') -> Dict[str, int]:
+        """
+        Get the web dashboard counters for one date in a single query.
+
+        Returns total employees plus check-in, check-out, still-working
+        and late counts, so the dashboard routes no longer fetch every
+        attendance row to count them in Python. Results are cached for
+        DASHBOARD_STATS_CACHE_TTL seconds so concurrent dashboard
+        pollers share one query; callers get a copy they may mutate.
+        """
+        cache_key = (date_obj, late_cutoff)
+        cached = self._dashboard_stats_cache.get(cache_key)
+        if cached is not None and cached[0] > monotonic():
+            return dict(cached[1])
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
+                    SELECT
+                        (SELECT COUNT(*) FROM employees),
+                        COUNT(a.check_in_time),
+                        COUNT(a.check_out_time),
+                        SUM(CASE WHEN a.check_in_time IS NOT NULL
+                                  AND a.check_out_time IS NULL
+                             THEN 1 ELSE 0 END),
+                        SUM(CASE WHEN a.check_in_time IS NOT NULL
+                                  AND substr(a.check_in_time, 12, 8) > ?
+                             THEN 1 ELSE 0 END)
+                    FROM attendance a
+                    WHERE a.date = ?
+                ''', (late_cutoff, date_obj))
+                row = cursor.fetchone()
+                stats = {
+                    'total_employees': row[0] or 0,
+                    'today_checkins': row[1] or 0,
+                    'today_checkouts': row[2] or 0,
+                    'active_employees': row[3] or 0,
+                    'late_employees': row[4] or 0,
+                }
+                self._dashboard_stats_cache[cache_key] = (
+                    monotonic() + self.DASHBOARD_STATS_CACHE_TTL, stats
+                )
+                return dict(stats)
+        except Exception as e:
+            logger.error(f"Error getting dashboard stats: {e}")
+            return {
+                'total_employees': 0, 'today_checkins': 0,
+                'today_checkouts': 0, 'active_employees': 0,
+                'late_employees': 0,
+            }
+
+    def get_attendance_counts_by_date(self, start_date: date,
+                                      end_date: date) -> Dict[str, Tuple[int, int]]:
+        """
+        Get per-day check-in/check-out counts for a date range.
+
+        One GROUP BY over the attendance date column replaces the
+        per-day record fetches the chart endpoint used to make; days
+        without rows are simply absent and callers backfill zeros.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT date,
+                           COUNT(check_in_time),
+                           COUNT(check_out_time)
+                    FROM attendance
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                ''', (start_date, end_date))
+                return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Error getting attendance counts by date: {e}")
+            return {}
+
+    def get_daily_attendance_records(self, date_obj: date,
+                                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get attendance records for a specific date for web interface.
+
+        Pass limit to let SQLite stop after the newest N rows instead
+        of materializing the whole day just to slice it in Python.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                sql = '''
                     SELECT a.id, a.telegram_id, e.first_name, e.last_name, e.username,
                            a.check_in_time, a.check_out_time, a.check_in_latitude, 
                            a.check_in_longitude, a.check_out_latitude, a.check_out_longitude,
@@ -705,10 +1345,14 @@ class AttendanceDatabase:
                     JOIN employees e ON a.telegram_id = e.telegram_id
                     WHERE a.date = ?
                     ORDER BY a.check_in_time DESC
-                ''', (date_obj,))
+                '''
+                if limit is not None:
+                    cursor.execute(sql + ' LIMIT ?', (date_obj, limit))
+                else:
+                    cursor.execute(sql, (date_obj,))
                 
                 records = []
-                for row in cursor.fetchall():
+                for row in cursor:
                     records.append({
                         'id': row[0],
                         'telegram_id': row[1],
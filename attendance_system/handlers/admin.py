@@ -4,8 +4,11 @@ Admin handlers module for the Enhanced Attendance System.
 This module contains all Telegram bot handlers for admin interactions.
 """
 
+import asyncio
 import logging
+import re
 from datetime import datetime, date
+from time import monotonic
 from typing import List, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -18,6 +21,69 @@ from ..utils.messages import MessageFormatter
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; matching against the DFA is far cheaper than a full
+# datetime.strptime parse just to validate an HH:MM field.
+_HHMM_RE = re.compile(r'^(?:[01]\d|2[0-3]):[0-5]\d$')
+
+# Telegram messages are capped at 4096 characters; leave headroom for
+# Markdown entities added around the payload.
+MESSAGE_CHUNK_LIMIT = 3900
+
+
+def _chunked(lines, limit: int = MESSAGE_CHUNK_LIMIT):
+    """
+    Yield joined message chunks from an iterable of lines.
+
+    Accumulates lines until the next one would exceed the Telegram
+    message limit, keeping memory at O(chunk_size) instead of building
+    the whole report string and re-splitting it.
+    """
+    buf = []
+    cur_len = 0
+    for line in lines:
+        if buf and cur_len + len(line) > limit:
+            yield ''.join(buf)
+            buf = []
+            cur_len = 0
+        buf.append(line)
+        cur_len += len(line)
+    if buf:
+        yield ''.join(buf)
+
+
+# InlineKeyboardMarkup objects are immutable, so the static admin
+# keyboards are built once at import instead of per callback.
+ADMIN_PANEL_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔗 Webhook Setup", callback_data="webhook_menu"),
+        InlineKeyboardButton("📊 Dashboard", callback_data="today_report")
+    ],
+    [
+        InlineKeyboardButton("👥 All Employees", callback_data="all_employees"),
+        InlineKeyboardButton("⏰ Exceptional Hours", callback_data="exceptional_hours_menu")
+    ],
+    [
+        InlineKeyboardButton("📈 Analytics", callback_data="analytics"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="settings_menu")
+    ],
+    [
+        InlineKeyboardButton("🖥️ Server Status", callback_data="server_status"),
+        InlineKeyboardButton("🔄 Refresh", callback_data="refresh_report")
+    ]
+])
+
+BACK_TO_WEBHOOK_MENU_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("« Back to Webhook Menu", callback_data="webhook_menu")
+]])
+
+BACK_TO_EMPLOYEES_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("« Back to Employees", callback_data="admin_all_employees")
+]])
+
+BACK_TO_MAIN_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("« Back to Main", callback_data="admin_main_menu")
+]])
+
 
 class AdminHandlers:
     """
@@ -39,7 +105,25 @@ class AdminHandlers:
         self.message_formatter = message_formatter
         self.keyboard_builder = KeyboardBuilder()
         self.config = Config()
-        
+        # Per-admin timestamp of the last refresh, used to debounce the
+        # Refresh button so rapid taps don't re-run the report queries
+        self._last_refresh = {}
+        # Exact-match callback routes; O(1) dispatch instead of walking
+        # an elif ladder, mirroring the text routes in EmployeeHandlers
+        self._callback_routes = {
+            "webhook_menu": self._handle_webhook_menu,
+            "webhook_info": self._handle_webhook_info,
+            "webhook_delete": self._handle_webhook_delete,
+            "today_report": self._handle_today_report,
+            "all_employees": self._handle_all_employees,
+            "exceptional_hours_menu": self._handle_exceptional_hours_menu,
+            "analytics": self._handle_analytics,
+            "settings_menu": self._handle_settings_menu,
+            "server_status": self._handle_server_status,
+            "refresh_report": self._handle_refresh_report,
+            "send_summary": self._handle_send_summary,
+        }
+
         logger.info("Admin handlers initialized")
     
     async def set_webhook_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -195,27 +279,9 @@ class AdminHandlers:
             await update.message.reply_text(error_message, parse_mode='Markdown')
             return
         
-        # Create enhanced admin keyboard with webhook management
-        keyboard = [
-            [
-                InlineKeyboardButton("🔗 Webhook Setup", callback_data="webhook_menu"),
-                InlineKeyboardButton("📊 Dashboard", callback_data="today_report")
-            ],
-            [
-                InlineKeyboardButton("👥 All Employees", callback_data="all_employees"),
-                InlineKeyboardButton("⏰ Exceptional Hours", callback_data="exceptional_hours_menu")
-            ],
-            [
-                InlineKeyboardButton("📈 Analytics", callback_data="analytics"),
-                InlineKeyboardButton("⚙️ Settings", callback_data="settings_menu")
-            ],
-            [
-                InlineKeyboardButton("🖥️ Server Status", callback_data="server_status"),
-                InlineKeyboardButton("🔄 Refresh", callback_data="refresh_report")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        # Enhanced admin keyboard with webhook management
+        reply_markup = ADMIN_PANEL_KEYBOARD
+
         await update.message.reply_text(
             "🔐 **Admin Control Panel**\n\n"
             "Welcome to the Enhanced Attendance System administration.\n"
@@ -313,8 +379,9 @@ class AdminHandlers:
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
             
             # Validate time formats
-            datetime.strptime(start_time, '%H:%M')
-            datetime.strptime(end_time, '%H:%M')
+            for value in (start_time, end_time):
+                if not _HHMM_RE.match(value):
+                    raise ValueError(f"invalid time '{value}', expected HH:MM")
             
             # Check if employee exists
             if not self.db.is_employee_registered(employee_id):
@@ -371,7 +438,7 @@ class AdminHandlers:
             return
         
         # Get today's summary data
-        summary_data = self.db.get_daily_summary()
+        summary_data = await asyncio.to_thread(self.db.get_daily_summary)
         summary_message = self.message_formatter.format_daily_summary(summary_data)
         
         # Add quick actions keyboard
@@ -394,7 +461,7 @@ class AdminHandlers:
             await update.message.reply_text(error_message, parse_mode='Markdown')
             return
         
-        employees = self.db.get_all_employees()
+        employees = await asyncio.to_thread(self.db.get_all_employees)
         
         if not employees:
             await update.message.reply_text(
@@ -404,31 +471,31 @@ class AdminHandlers:
             )
             return
         
-        message = "👥 **Employee Directory**\n\n"
-        
-        for i, emp in enumerate(employees[:10], 1):  # Limit to first 10 for readability
-            telegram_id, username, first_name, last_name, phone, registration_date = emp
-            name = f"{first_name} {last_name or ''}".strip()
-            username_str = f"@{username}" if username else "No username"
-            
-            message += f"**{i}. {name}**\n"
-            message += f"   ID: `{telegram_id}`\n"
-            message += f"   Username: {username_str}\n"
-            message += f"   Phone: {phone or 'Not provided'}\n"
-            message += f"   Registered: {registration_date}\n\n"
-        
-        if len(employees) > 10:
-            message += f"... and {len(employees) - 10} more employees\n"
-            message += "Use inline buttons for full employee management."
-        
+        def employee_lines():
+            yield "👥 **Employee Directory**\n\n"
+            for i, emp in enumerate(employees, 1):
+                name = f"{emp['first_name']} {emp['last_name'] or ''}".strip()
+                username_str = f"@{emp['username']}" if emp['username'] else "No username"
+
+                yield (f"**{i}. {name}**\n"
+                       f"   ID: `{emp['telegram_id']}`\n"
+                       f"   Username: {username_str}\n"
+                       f"   Phone: {emp['phone_number'] or 'Not provided'}\n"
+                       f"   Registered: {emp['created_at']}\n\n")
+
         # Add employee management keyboard
         keyboard = [[
             InlineKeyboardButton("👥 Full Employee List", callback_data="admin_all_employees"),
             InlineKeyboardButton("📊 Employee Reports", callback_data="admin_employee_reports")
         ]]
-        
+
+        # Stream the directory in Telegram-sized chunks; the keyboard
+        # goes on the final message only.
+        chunks = list(_chunked(employee_lines()))
+        for chunk in chunks[:-1]:
+            await update.message.reply_text(chunk, parse_mode='Markdown')
         await update.message.reply_text(
-            message,
+            chunks[-1],
             reply_markup=InlineKeyboardMarkup(keyboard),
             parse_mode='Markdown'
         )
@@ -444,16 +511,26 @@ class AdminHandlers:
             await update.message.reply_text(error_message, parse_mode='Markdown')
             return
         
-        # Get server activity logs
-        recent_activities = self.db.get_recent_server_activity(10)
-        
+        # The two status queries are independent; run them concurrently
+        # in threads so neither blocks the event loop
+        recent_activities, notification_counts = await asyncio.gather(
+            asyncio.to_thread(self.db.get_recent_server_activity, 10),
+            asyncio.to_thread(self.db.get_todays_notification_counts)
+        )
+
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
+
         message = f"🖥️ **Server Status Report**\n\n"
         message += f"**Current Time:** {current_time}\n"
         message += f"**Timezone:** {Config.TIMEZONE}\n"
         message += f"**Health Checks:** {'Enabled' if Config.ENABLE_SERVER_WAKEUP else 'Disabled'}\n\n"
-        
+
+        if notification_counts:
+            message += "**Notifications Today:**\n"
+            for notification_type, count in notification_counts:
+                message += f"• {notification_type}: {count}\n"
+            message += "\n"
+
         message += "**Recent Activity:**\n"
         if recent_activities:
             for activity in recent_activities:
@@ -481,8 +558,10 @@ class AdminHandlers:
         query = update.callback_query
         user = query.from_user
         
-        # Answer the callback query to remove loading state
-        await query.answer()
+        # Answer the callback query to remove the loading spinner; no
+        # result is needed, so let the acknowledgement fly in parallel
+        # with the handler body instead of serializing on its round-trip
+        answer_task = asyncio.create_task(query.answer())
         
         if not self.db.is_admin(user.id):
             await query.edit_message_text("❌ Admin privileges required.")
@@ -491,33 +570,15 @@ class AdminHandlers:
         data = query.data
         
         # Route callback queries
-        if data == "webhook_menu":
-            await self._handle_webhook_menu(query)
-        elif data == "webhook_info":
-            await self._handle_webhook_info(query)
-        elif data == "webhook_delete":
-            await self._handle_webhook_delete(query)
-        elif data == "today_report":
-            await self._handle_today_report(query)
-        elif data == "all_employees":
-            await self._handle_all_employees(query)
-        elif data == "exceptional_hours_menu":
-            await self._handle_exceptional_hours_menu(query)
-        elif data == "analytics":
-            await self._handle_analytics(query)
-        elif data == "settings_menu":
-            await self._handle_settings_menu(query)
-        elif data == "server_status":
-            await self._handle_server_status(query)
-        elif data == "refresh_report":
-            await self._handle_refresh_report(query)
-        elif data == "send_summary":
-            await self._handle_send_summary(query)
+        handler = self._callback_routes.get(data)
+        if handler is not None:
+            await handler(query)
         elif data.startswith("emp_"):
             await self._handle_employee_action(query, data)
         else:
             await query.edit_message_text("❓ Unknown action.")
         
+        await answer_task
         logger.info(f"Callback query '{data}' handled for admin {user.id}")
     
     async def _handle_webhook_menu(self, query) -> None:
@@ -601,12 +662,9 @@ class AdminHandlers:
                 message += "❌ **No webhook configured**\n"
                 message += "Bot is running in polling mode."
             
-            keyboard = [[InlineKeyboardButton("« Back to Webhook Menu", callback_data="webhook_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 message,
-                reply_markup=reply_markup,
+                reply_markup=BACK_TO_WEBHOOK_MENU_KEYBOARD,
                 parse_mode='Markdown'
             )
             
@@ -627,12 +685,9 @@ class AdminHandlers:
             message += "This is suitable for development but not for production.\n\n"
             message += "Use `/set_webhook <url>` to configure a new webhook."
             
-            keyboard = [[InlineKeyboardButton("« Back to Webhook Menu", callback_data="webhook_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 message,
-                reply_markup=reply_markup,
+                reply_markup=BACK_TO_WEBHOOK_MENU_KEYBOARD,
                 parse_mode='Markdown'
             )
             
@@ -647,7 +702,7 @@ class AdminHandlers:
     
     async def _handle_today_report(self, query) -> None:
         """Handle today's report callback."""
-        summary_data = self.db.get_daily_summary()
+        summary_data = await asyncio.to_thread(self.db.get_daily_summary)
         summary_message = self.message_formatter.format_daily_summary(summary_data)
         
         keyboard = self.keyboard_builder.get_quick_action_keyboard()
@@ -660,21 +715,22 @@ class AdminHandlers:
     
     async def _handle_all_employees(self, query) -> None:
         """Handle all employees list callback."""
-        employees = self.db.get_all_employees()
+        employees = await asyncio.to_thread(self.db.get_all_employees)
         
         if not employees:
             await query.edit_message_text("👥 No employees registered yet.")
             return
         
-        # Create paginated employee list (show first 5)
-        message = "👥 **All Employees**\n\n"
-        
+        # Create paginated employee list (show first 5); build the
+        # message as a list of parts and join once
+        parts = ["👥 **All Employees**\n\n"]
+
         for i, emp in enumerate(employees[:5], 1):
-            telegram_id, username, first_name, last_name, phone, registration_date = emp
-            name = f"{first_name} {last_name or ''}".strip()
-            
-            message += f"**{i}. {name}**\n"
-            message += f"   ID: `{telegram_id}` | Phone: {phone or 'N/A'}\n\n"
+            name = f"{emp['first_name']} {emp['last_name'] or ''}".strip()
+            parts.append(f"**{i}. {name}**\n")
+            parts.append(f"   ID: `{emp['telegram_id']}` | Phone: {emp['phone_number'] or 'N/A'}\n\n")
+
+        message = ''.join(parts)
         
         # Add pagination keyboard if needed
         if len(employees) > 5:
@@ -712,16 +768,27 @@ class AdminHandlers:
     
     async def _handle_analytics(self, query) -> None:
         """Handle analytics callback."""
-        # Get basic analytics data
-        total_employees = len(self.db.get_all_employees())
-        today_summary = self.db.get_daily_summary()
-        
+        # Run the three aggregation queries off the event loop and in
+        # parallel; none depends on another
+        all_employees, today_summary, weekly_summary = await asyncio.gather(
+            asyncio.to_thread(self.db.get_all_employees),
+            asyncio.to_thread(self.db.get_daily_summary),
+            asyncio.to_thread(self.db.get_weekly_summary),
+        )
+        total_employees = len(all_employees)
+        weekly_totals = weekly_summary.get('totals', {})
+
         message = f"📈 **System Analytics**\n\n"
         message += f"**Overview:**\n"
         message += f"• Total Employees: {total_employees}\n"
         message += f"• Today's Attendance Rate: {today_summary.get('attendance_rate', 0):.1f}%\n"
         message += f"• Late Check-ins Today: {today_summary.get('late_checkins', 0)}\n"
         message += f"• Early Departures Today: {today_summary.get('early_checkouts', 0)}\n\n"
+        message += f"**Last 7 Days:**\n"
+        message += f"• Check-ins: {weekly_totals.get('checkins', 0)}\n"
+        message += f"• Late Check-ins: {weekly_totals.get('late', 0)}\n"
+        message += f"• Early Departures: {weekly_totals.get('early', 0)}\n"
+        message += f"• Avg Check-ins/Day: {weekly_totals.get('avg_checkins', 0):.1f}\n\n"
         message += "📊 More detailed analytics available via web interface."
         
         keyboard = InlineKeyboardMarkup([[
@@ -750,18 +817,20 @@ class AdminHandlers:
     
     async def _handle_server_status(self, query) -> None:
         """Handle server status callback."""
-        recent_activities = self.db.get_recent_server_activity(5)
+        recent_activities = await asyncio.to_thread(self.db.get_recent_server_activity, 5)
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        message = f"🖥️ **Server Status**\n\n"
-        message += f"**Status:** ✅ Online\n"
-        message += f"**Time:** {current_time}\n"
-        message += f"**Health Checks:** {'Enabled' if Config.ENABLE_SERVER_WAKEUP else 'Disabled'}\n\n"
-        
-        message += "**Recent Activity:**\n"
+
+        parts = [
+            f"🖥️ **Server Status**\n\n",
+            f"**Status:** ✅ Online\n",
+            f"**Time:** {current_time}\n",
+            f"**Health Checks:** {'Enabled' if Config.ENABLE_SERVER_WAKEUP else 'Disabled'}\n\n",
+            "**Recent Activity:**\n"
+        ]
         for activity in recent_activities:
             timestamp, activity_type, description = activity
-            message += f"• `{timestamp}` - {activity_type}\n"
+            parts.append(f"• `{timestamp}` - {activity_type}\n")
+        message = ''.join(parts)
         
         keyboard = InlineKeyboardMarkup([[
             InlineKeyboardButton("🔄 Refresh", callback_data="admin_server_status"),
@@ -774,8 +843,19 @@ class AdminHandlers:
             parse_mode='Markdown'
         )
     
+    # Minimum seconds between refreshes per admin
+    REFRESH_DEBOUNCE_SECONDS = 3.0
+
     async def _handle_refresh_report(self, query) -> None:
-        """Handle refresh report callback."""
+        """Handle refresh report callback with per-admin debouncing."""
+        now = monotonic()
+        last = self._last_refresh.get(query.from_user.id, 0.0)
+
+        if now - last < self.REFRESH_DEBOUNCE_SECONDS:
+            # Report was refreshed moments ago; skip the SQL re-query
+            return
+
+        self._last_refresh[query.from_user.id] = now
         await self._handle_today_report(query)
     
     async def _handle_send_summary(self, query) -> None:
@@ -806,43 +886,42 @@ class AdminHandlers:
     
     async def _show_employee_report(self, query, employee_id: int) -> None:
         """Show individual employee report."""
-        employee_info = self.db.get_employee_info(employee_id)
+        employee_info, status = await asyncio.gather(
+            asyncio.to_thread(self.db.get_employee_info, employee_id),
+            asyncio.to_thread(self.db.get_attendance_status, employee_id)
+        )
         if not employee_info:
             await query.edit_message_text("❌ Employee not found.")
             return
         
         name = f"{employee_info[1]} {employee_info[2] or ''}".strip()
         
-        # Get recent attendance for this employee
-        status = self.db.get_attendance_status(employee_id)
-        
-        message = f"📊 **Employee Report: {name}**\n\n"
-        message += f"**Telegram ID:** `{employee_id}`\n"
-        
+        # Assemble fragments and join once, as the other report builders do
+        parts = [
+            f"📊 **Employee Report: {name}**\n\n",
+            f"**Telegram ID:** `{employee_id}`\n",
+        ]
+
         if status:
-            message += f"**Today's Status:** {'✅ Checked In' if status[2] == 'checked_in' else '⏹️ Checked Out'}\n"
+            parts.append(f"**Today's Status:** {'✅ Checked In' if status[2] == 'checked_in' else '⏹️ Checked Out'}\n")
+            # ISO timestamps carry HH:MM:SS at a fixed offset; slice it
+            # out rather than parsing into datetime just to re-format
             if status[0]:  # check_in_time
-                check_in_time = datetime.fromisoformat(status[0])
-                message += f"**Check-in:** {check_in_time.strftime('%H:%M:%S')}\n"
+                parts.append(f"**Check-in:** {status[0][11:19]}\n")
             if status[1]:  # check_out_time
-                check_out_time = datetime.fromisoformat(status[1])
-                message += f"**Check-out:** {check_out_time.strftime('%H:%M:%S')}\n"
+                parts.append(f"**Check-out:** {status[1][11:19]}\n")
         else:
-            message += "**Today's Status:** ❌ Not checked in\n"
-        
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Employees", callback_data="admin_all_employees")
-        ]])
-        
+            parts.append("**Today's Status:** ❌ Not checked in\n")
+
         await query.edit_message_text(
-            message,
-            reply_markup=keyboard,
+            ''.join(parts),
+            reply_markup=BACK_TO_EMPLOYEES_KEYBOARD,
             parse_mode='Markdown'
         )
     
     async def _show_employee_exception_form(self, query, employee_id: int) -> None:
         """Show employee exception form."""
-        employee_info = self.db.get_employee_info(employee_id)
+        employee_info = await asyncio.to_thread(self.db.get_employee_info, employee_id)
         if not employee_info:
             await query.edit_message_text("❌ Employee not found.")
             return
@@ -857,12 +936,8 @@ class AdminHandlers:
         message += "**Example:**\n"
         message += f"`/exceptional_hours {employee_id} 2024-01-15 10:00 16:00 Medical appointment`"
         
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Employees", callback_data="admin_all_employees")
-        ]])
-        
         await query.edit_message_text(
             message,
-            reply_markup=keyboard,
+            reply_markup=BACK_TO_EMPLOYEES_KEYBOARD,
             parse_mode='Markdown'
         ) 
\ No newline at end of file
@@ -4,8 +4,10 @@ Employee handlers module for the Enhanced Attendance System.
 This module contains all Telegram bot handlers for employee interactions.
 """
 
+import asyncio
 import logging
-from datetime import datetime
+import struct
+from datetime import datetime, timedelta
 from typing import Optional
 
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
@@ -19,6 +21,23 @@ from ..utils.messages import MessageFormatter
 
 logger = logging.getLogger(__name__)
 
+# Pending check-in/out coordinates ride through conversation_state as a
+# fixed 24-byte struct instead of a "lat,lon,distance" decimal string:
+# one C pack/unpack call each way and no float re-parsing
+_LOCATION_STRUCT = struct.Struct('<ddd')
+
+
+def _unpack_location_data(data):
+    """Decode (latitude, longitude, distance) from conversation state.
+
+    Falls back to the legacy comma-separated text format so states
+    written before an upgrade still resolve until they expire.
+    """
+    if isinstance(data, bytes):
+        return _LOCATION_STRUCT.unpack(data)
+    lat_str, lon_str, distance_str = data.split(',')
+    return float(lat_str), float(lon_str), float(distance_str)
+
 
 class EmployeeHandlers:
     """
@@ -40,33 +59,49 @@ class EmployeeHandlers:
         self.message_formatter = message_formatter
         self.location_validator = LocationValidator()
         self.keyboard_builder = KeyboardBuilder()
-        
+        # Keyboards are immutable; build the handful of variants once
+        # instead of reconstructing them on every reply
+        self._checkin_keyboard = self.keyboard_builder.get_location_keyboard(False)
+        self._checkout_keyboard = self.keyboard_builder.get_location_keyboard(True)
+        self._registration_keyboard = self.keyboard_builder.get_registration_keyboard()
+        self._contact_keyboard = self.keyboard_builder.get_contact_keyboard()
+        # O(1) dispatch table for the fixed reply-keyboard labels,
+        # replacing an equality chain evaluated on every text message
+        self._text_routes = {
+            "📊 My Status": self._show_status_button,
+            "📈 My Report": self._show_report_button,
+            "ℹ️ Help": self._show_help_button,
+            "🟢 Check In": self._location_required_reply,
+            "🔴 Check Out": self._location_required_reply,
+        }
+
         logger.info("Employee handlers initialized")
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
         user = update.effective_user
-        
-        if not self.db.is_employee_registered(user.id):
+
+        # Registration state and today's status come back in one query
+        is_registered, status = self.db.get_registration_and_status(user.id)
+
+        if not is_registered:
             welcome_message = self.message_formatter.format_welcome_message(
                 user.first_name, is_registered=False
             )
-            keyboard = self.keyboard_builder.get_registration_keyboard()
-            
+            keyboard = self._registration_keyboard
+
             await update.message.reply_text(
                 welcome_message,
                 reply_markup=keyboard,
                 parse_mode='Markdown'
             )
         else:
-            # Check current status
-            status = self.db.get_attendance_status(user.id)
             is_checked_in = status and status[2] == 'checked_in'
             
             welcome_message = self.message_formatter.format_welcome_message(
                 user.first_name, is_registered=True
             )
-            keyboard = self.keyboard_builder.get_location_keyboard(is_checked_in)
+            keyboard = self._checkout_keyboard if is_checked_in else self._checkin_keyboard
             
             await update.message.reply_text(
                 welcome_message,
@@ -84,7 +119,7 @@ class EmployeeHandlers:
             await update.message.reply_text("✅ You are already registered!")
             return
         
-        keyboard = self.keyboard_builder.get_contact_keyboard()
+        keyboard = self._contact_keyboard
         await update.message.reply_text(
             "📝 Please share your contact information by clicking the 'Share Contact' button below.",
             reply_markup=keyboard,
@@ -108,7 +143,7 @@ class EmployeeHandlers:
         )
         
         if success:
-            keyboard = self.keyboard_builder.get_location_keyboard(False)
+            keyboard = self._checkin_keyboard
             await update.message.reply_text(
                 "✅ **Registration Successful!**\n\n"
                 "Welcome to the Enhanced Attendance System!\n"
@@ -127,25 +162,26 @@ class EmployeeHandlers:
         """Handle location sharing for check-in/check-out."""
         user = update.effective_user
         location = update.message.location
-        
-        if not self.db.is_employee_registered(user.id):
+
+        # One query covers both the registration check and today's
+        # status, which decides check-in vs check-out below
+        is_registered, status = self.db.get_registration_and_status(user.id)
+
+        if not is_registered:
             error_message = self.message_formatter.format_error_message("not_registered")
             await update.message.reply_text(error_message, parse_mode='Markdown')
             return
-        
+
         # Validate location
         is_within_radius, distance = self.location_validator.is_within_office_radius(
             location.latitude, location.longitude
         )
-        
+
         if not is_within_radius:
             denial_message = self.message_formatter.format_location_denied_message(distance)
             await update.message.reply_text(denial_message, parse_mode='Markdown')
             return
-        
-        # Check current status to determine check-in or check-out
-        status = self.db.get_attendance_status(user.id)
-        
+
         if not status or status[2] == 'checked_out':
             await self._handle_checkin(update, location, distance)
         elif status[2] == 'checked_in':
@@ -155,40 +191,49 @@ class EmployeeHandlers:
         """Handle check-in process."""
         user = update.effective_user
         
+        # One clock read serves the whole invocation
+        now = datetime.now(self.db.timezone)
+        
         # Check if this would be a late check-in
-        is_late = self.db._is_late_checkin(user.id, datetime.now(self.db.timezone))
+        is_late = self.db._is_late_checkin(user.id, now)
         
         if is_late:
-            # Set conversation state to expect late reason
-            self.db.set_conversation_state(
-                user.id, 
-                'waiting_late_reason', 
-                f"{location.latitude},{location.longitude},{distance}"
-            )
-            
             # Get work hours for context
-            work_start, _ = self.db.get_effective_work_hours(user.id, datetime.now(self.db.timezone).date())
-            current_time = datetime.now(self.db.timezone).strftime('%H:%M')
-            
+            work_start, _ = self.db.get_effective_work_hours(user.id, now.date())
+            current_time = now.strftime('%H:%M')
+
             prompt_message = self.message_formatter.format_conversation_prompt(
                 'late_reason', 
                 {'work_start': work_start, 'current_time': current_time}
             )
-            
-            await update.message.reply_text(prompt_message, parse_mode='Markdown')
+
+            # The state write and the prompt are independent; run the
+            # SQLite write in a thread while the Telegram HTTP call is
+            # in flight
+            await asyncio.gather(
+                asyncio.to_thread(
+                    self.db.set_conversation_state,
+                    user.id,
+                    'waiting_late_reason',
+                    _LOCATION_STRUCT.pack(location.latitude, location.longitude, distance)
+                ),
+                update.message.reply_text(prompt_message, parse_mode='Markdown')
+            )
             return
         
-        # Normal check-in (not late)
-        success, message, is_late = self.db.check_in(
+        # Normal check-in (not late); the reply depends on the result,
+        # so it cannot overlap, but the write still runs off the event
+        # loop so other chats keep flowing
+        success, message, is_late, time_str = await asyncio.to_thread(
+            self.db.check_in,
             user.id, location.latitude, location.longitude, distance
         )
-        
+
         if success:
-            time_str = message.split('at ')[1]
             success_message = self.message_formatter.format_check_in_success(
                 time_str, distance, is_late
             )
-            keyboard = self.keyboard_builder.get_location_keyboard(True)
+            keyboard = self._checkout_keyboard
             
             await update.message.reply_text(
                 success_message,
@@ -204,45 +249,49 @@ class EmployeeHandlers:
         """Handle check-out process."""
         user = update.effective_user
         
+        # One clock read serves the whole invocation
+        now = datetime.now(self.db.timezone)
+        
         # Check if this would be an early check-out
-        is_early = self.db._is_early_checkout(user.id, datetime.now(self.db.timezone))
+        is_early = self.db._is_early_checkout(user.id, now)
         
         if is_early:
-            # Set conversation state to expect early checkout reason
-            self.db.set_conversation_state(
-                user.id,
-                'waiting_early_reason',
-                f"{location.latitude},{location.longitude},{distance}"
-            )
-            
             # Get work hours for context
-            _, work_end = self.db.get_effective_work_hours(user.id, datetime.now(self.db.timezone).date())
-            current_time = datetime.now(self.db.timezone).strftime('%H:%M')
-            
+            _, work_end = self.db.get_effective_work_hours(user.id, now.date())
+            current_time = now.strftime('%H:%M')
+
             prompt_message = self.message_formatter.format_conversation_prompt(
                 'early_reason',
                 {'work_end': work_end, 'current_time': current_time}
             )
-            
-            await update.message.reply_text(prompt_message, parse_mode='Markdown')
+
+            # Overlap the state write with the outgoing prompt, as in
+            # the late check-in path
+            await asyncio.gather(
+                asyncio.to_thread(
+                    self.db.set_conversation_state,
+                    user.id,
+                    'waiting_early_reason',
+                    _LOCATION_STRUCT.pack(location.latitude, location.longitude, distance)
+                ),
+                update.message.reply_text(prompt_message, parse_mode='Markdown')
+            )
             return
         
-        # Normal check-out (not early)
-        success, message, is_early = self.db.check_out(
+        # Normal check-out (not early); run the write off the event loop
+        success, message, is_early, time_str, duration = await asyncio.to_thread(
+            self.db.check_out,
             user.id, location.latitude, location.longitude, distance
         )
-        
+
         if success:
-            # Calculate work duration
-            check_in_time = datetime.fromisoformat(status[0])
-            check_out_time = datetime.now(self.db.timezone)
-            work_duration = check_out_time - check_in_time
-            time_str = message.split('at ')[1]
+            # Work duration comes straight from SQLite in whole seconds
+            work_duration = timedelta(seconds=duration)
             
             success_message = self.message_formatter.format_check_out_success(
                 time_str, distance, work_duration, is_early
             )
-            keyboard = self.keyboard_builder.get_location_keyboard(False)
+            keyboard = self._checkin_keyboard
             
             await update.message.reply_text(
                 success_message,
@@ -266,36 +315,36 @@ class EmployeeHandlers:
             await self._process_late_reason(update, text, data)
         elif state == 'waiting_early_reason':
             await self._process_early_reason(update, text, data)
-        elif text in ["🟢 Check In", "🔴 Check Out"]:
-            # If user tries to use text buttons instead of location
-            error_message = self.message_formatter.format_error_message("location_required")
-            await update.message.reply_text(error_message, parse_mode='Markdown')
         else:
-            await self._handle_other_commands(update, text)
+            handler = self._text_routes.get(text)
+            if handler:
+                await handler(update)
+            else:
+                await update.message.reply_text(
+                    "❓ **Unknown Command**\n\n"
+                    "Please use the buttons provided or type /help for assistance.",
+                    parse_mode='Markdown'
+                )
     
     async def _process_late_reason(self, update: Update, reason: str, location_data: str) -> None:
         """Process late check-in reason."""
         user = update.effective_user
-        lat_str, lon_str, distance_str = location_data.split(',')
-        
-        latitude = float(lat_str)
-        longitude = float(lon_str)
-        distance = float(distance_str)
+        latitude, longitude, distance = _unpack_location_data(location_data)
         
-        # Perform check-in with reason
-        success, message, is_late = self.db.check_in(
-            user.id, latitude, longitude, distance, reason
+        # Perform check-in with reason, off the event loop like the
+        # no-reason path
+        success, message, is_late, time_str = await asyncio.to_thread(
+            self.db.check_in, user.id, latitude, longitude, distance, reason
         )
-        
+
         # Clear conversation state
         self.db.clear_conversation_state(user.id)
-        
+
         if success:
-            time_str = message.split('at ')[1]
             success_message = self.message_formatter.format_check_in_success(
                 time_str, distance, is_late, reason
             )
-            keyboard = self.keyboard_builder.get_location_keyboard(True)
+            keyboard = self._checkout_keyboard
             
             await update.message.reply_text(
                 success_message,
@@ -310,61 +359,55 @@ class EmployeeHandlers:
     async def _process_early_reason(self, update: Update, reason: str, location_data: str) -> None:
         """Process early check-out reason."""
         user = update.effective_user
-        lat_str, lon_str, distance_str = location_data.split(',')
-        
-        latitude = float(lat_str)
-        longitude = float(lon_str)
-        distance = float(distance_str)
+        latitude, longitude, distance = _unpack_location_data(location_data)
         
-        # Perform check-out with reason
-        success, message, is_early = self.db.check_out(
-            user.id, latitude, longitude, distance, reason
+        # Perform check-out with reason, off the event loop like the
+        # no-reason path
+        success, message, is_early, time_str, duration = await asyncio.to_thread(
+            self.db.check_out, user.id, latitude, longitude, distance, reason
         )
-        
+
         # Clear conversation state
         self.db.clear_conversation_state(user.id)
-        
+
         if success:
-            # Calculate work duration from status
-            status = self.db.get_attendance_status(user.id)
-            if status:
-                check_in_time = datetime.fromisoformat(status[0])
-                check_out_time = datetime.now(self.db.timezone)
-                work_duration = check_out_time - check_in_time
-                time_str = message.split('at ')[1]
-                
-                success_message = self.message_formatter.format_check_out_success(
-                    time_str, distance, work_duration, is_early, reason
-                )
-                keyboard = self.keyboard_builder.get_location_keyboard(False)
-                
-                await update.message.reply_text(
-                    success_message,
-                    reply_markup=keyboard,
-                    parse_mode='Markdown'
-                )
+            # Work duration comes straight from SQLite in whole seconds
+            work_duration = timedelta(seconds=duration)
+
+            success_message = self.message_formatter.format_check_out_success(
+                time_str, distance, work_duration, is_early, reason
+            )
+            keyboard = self._checkin_keyboard
+
+            await update.message.reply_text(
+                success_message,
+                reply_markup=keyboard,
+                parse_mode='Markdown'
+            )
         else:
             await update.message.reply_text(f"❌ {message}")
         
         logger.info(f"Early check-out with reason processed for user {user.id}")
     
-    async def _handle_other_commands(self, update: Update, text: str) -> None:
-        """Handle other commands like status, reports, etc."""
-        if text == "📊 My Status":
-            await self.status_command(update, None)
-        elif text == "📈 My Report":
-            await self.report_command(update, None)
-        elif text == "ℹ️ Help":
-            user = update.effective_user
-            is_admin = self.db.is_admin(user.id)
-            help_message = self.message_formatter.format_help_message(is_admin, True)
-            await update.message.reply_text(help_message, parse_mode='Markdown')
-        else:
-            await update.message.reply_text(
-                "❓ **Unknown Command**\n\n"
-                "Please use the buttons provided or type /help for assistance.",
-                parse_mode='Markdown'
-            )
+    async def _show_status_button(self, update: Update) -> None:
+        """Route the status button to the status command."""
+        await self.status_command(update, None)
+
+    async def _show_report_button(self, update: Update) -> None:
+        """Route the report button to the report command."""
+        await self.report_command(update, None)
+
+    async def _show_help_button(self, update: Update) -> None:
+        """Send contextual help for the help button."""
+        user = update.effective_user
+        is_admin = self.db.is_admin(user.id)
+        help_message = self.message_formatter.format_help_message(is_admin, True)
+        await update.message.reply_text(help_message, parse_mode='Markdown')
+
+    async def _location_required_reply(self, update: Update) -> None:
+        """Remind users that check-in/out needs a shared location."""
+        error_message = self.message_formatter.format_error_message("location_required")
+        await update.message.reply_text(error_message, parse_mode='Markdown')
     
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show current attendance status."""
@@ -388,9 +431,37 @@ class EmployeeHandlers:
     async def report_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show attendance report for last 7 days."""
         user = update.effective_user
-        
-        # This would typically fetch recent attendance records
-        # For now, just show current status
-        await self.status_command(update, context)
-        
+
+        records = self.db.get_recent_attendance(user.id, days=7)
+
+        if not records:
+            await update.message.reply_text(
+                "📈 <b>My Report - Last 7 Days</b>\n\n"
+                "No attendance records found for the last 7 days.",
+                parse_mode='HTML'
+            )
+            return
+
+        # Collect lines and join once rather than growing a string
+        lines = ["📈 <b>My Report - Last 7 Days</b>\n\n"]
+
+        for record in records:
+            date_str, check_in, check_out, is_late, is_early, duration = record
+            # Timestamps are ISO strings ("YYYY-MM-DD HH:MM:SS..."); slice
+            # HH:MM out directly instead of building datetime objects, and
+            # let SQLite supply the worked duration in whole seconds
+            check_in_str = check_in[11:16] if check_in else '—'
+            check_out_str = check_out[11:16] if check_out else '—'
+            if duration is not None:
+                hours, minutes = divmod(duration // 60, 60)
+                worked = f" ({hours}h {minutes}m)"
+            else:
+                worked = ""
+
+            markers = f"{' ⏰' if is_late else ''}{' 🕕' if is_early else ''}"
+            lines.append(f"<b>{date_str}:</b> {check_in_str} → {check_out_str}{worked}{markers}\n")
+
+        # HTML entities are unambiguous server-side, unlike legacy Markdown
+        # which can reject on stray formatting characters and force retries
+        await update.message.reply_text(''.join(lines), parse_mode='HTML')
         logger.info(f"Report command processed for user {user.id}") 
\ No newline at end of file
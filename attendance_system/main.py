@@ -134,8 +134,9 @@ class AttendanceBot:
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /help command."""
         user = update.effective_user
-        is_admin = self.db.is_admin(user.id)
-        is_registered = self.db.is_employee_registered(user.id)
+        # One round-trip for both flags instead of separate
+        # is_admin/is_employee_registered queries
+        is_registered, is_admin = self.db.get_user_flags(user.id)
         
         help_message = self.message_formatter.format_help_message(is_admin, is_registered)
         await update.message.reply_text(help_message, parse_mode='Markdown')
@@ -10,13 +10,22 @@ import threading
 from datetime import datetime
 from typing import Optional
 
-from flask import Flask, jsonify
+import pytz
+from flask import Flask, Response, jsonify, request
 
 from ..core.database import AttendanceDatabase
 from ..core.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import, matching the rest of the codebase; probe
+# timestamps are reported in Cairo time regardless of the host clock
+_TIMEZONE = pytz.timezone(Config.TIMEZONE)
+
+# /ping answers monitoring probes every few seconds; the body skeleton
+# is constant, so only the timestamp is interpolated per request
+_PING_BODY = '{"message": "pong", "timestamp": "%s"}' 
+
 
 class HealthService:
     """
@@ -53,7 +62,7 @@ class HealthService:
                 # Test database connection
                 self.db.log_server_activity('health_check', 'Health endpoint accessed')
                 
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                current_time = datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 
                 return jsonify({
                     'status': 'healthy',
@@ -68,16 +77,16 @@ class HealthService:
                 return jsonify({
                     'status': 'unhealthy',
                     'error': str(e),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 500
         
         @self.app.route('/status', methods=['GET'])
         def server_status():
             """Detailed server status endpoint."""
             try:
-                # Get system statistics
-                total_employees = len(self.db.get_all_employees())
-                total_admins = len(self.db.get_all_admins())
+                # Get system statistics; counts come back from one
+                # query instead of materialising both tables
+                total_employees, total_admins = self.db.get_status_counts()
                 
                 today_summary = self.db.get_daily_summary()
                 
@@ -87,7 +96,7 @@ class HealthService:
                     'status': 'online',
                     'service': 'Enhanced Attendance System',
                     'version': '2.0.0',
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S'),
                     'timezone': Config.TIMEZONE,
                     'office_location': {
                         'latitude': Config.OFFICE_LATITUDE,
@@ -127,16 +136,14 @@ class HealthService:
                 return jsonify({
                     'status': 'error',
                     'error': str(e),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 500
         
         @self.app.route('/ping', methods=['GET'])
         def ping():
             """Simple ping endpoint."""
-            return jsonify({
-                'message': 'pong',
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }), 200
+            body = _PING_BODY % datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
+            return Response(body, mimetype='application/json')
         
         @self.app.route('/stats', methods=['GET'])
         def attendance_stats():
@@ -145,7 +152,7 @@ class HealthService:
                 summary = self.db.get_daily_summary()
                 
                 stats = {
-                    'date': summary.get('date', datetime.now().strftime('%Y-%m-%d')),
+                    'date': summary.get('date', datetime.now(_TIMEZONE).strftime('%Y-%m-%d')),
                     'total_employees': summary.get('total_employees', 0),
                     'checked_in_today': summary.get('checked_in', 0),
                     'checked_out_today': summary.get('checked_out', 0),
@@ -163,7 +170,7 @@ class HealthService:
                 logger.error(f"Stats check failed: {e}")
                 return jsonify({
                     'error': str(e),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 500
         
         @self.app.route('/activity', methods=['GET'])
@@ -185,22 +192,19 @@ class HealthService:
                 return jsonify({
                     'activities': activity_data,
                     'count': len(activity_data),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 200
                 
             except Exception as e:
                 logger.error(f"Activity check failed: {e}")
                 return jsonify({
                     'error': str(e),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 500
         
         @self.app.route('/webhook', methods=['POST'])
         def webhook_endpoint():
             """Webhook endpoint for Telegram updates."""
-            from flask import request
-            import json
-            
             try:
                 # Get the update data
                 update_data = request.get_json()
@@ -220,7 +224,7 @@ class HealthService:
                     'status': 'ok',
                     'message': 'Webhook received',
                     'update_id': update_data.get('update_id'),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 200
                 
             except Exception as e:
@@ -228,7 +232,7 @@ class HealthService:
                 return jsonify({
                     'status': 'error', 
                     'error': str(e),
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
                 }), 500
         
         # Disable Flask logging to avoid cluttering the console
@@ -267,15 +271,20 @@ class HealthService:
         logger.info("Health service stopped")
     
     def _run_flask_server(self) -> None:
-        """Run Flask server in thread."""
+        """Run the health server in this thread, preferring waitress."""
         try:
-            self.app.run(
-                host='0.0.0.0',
-                port=Config.PORT,
-                debug=False,
-                use_reloader=False,
-                threaded=True
-            )
+            try:
+                from waitress import serve
+                serve(self.app, host='0.0.0.0', port=Config.PORT, threads=4)
+            except ImportError:
+                logger.warning("waitress not installed; using Flask dev server")
+                self.app.run(
+                    host='0.0.0.0',
+                    port=Config.PORT,
+                    debug=False,
+                    use_reloader=False,
+                    threaded=True
+                )
         except Exception as e:
             logger.error(f"Error running Flask server: {e}")
     
@@ -288,11 +297,11 @@ class HealthService:
         """
         try:
             # Test database connection
-            total_employees = len(self.db.get_all_employees())
+            total_employees, _ = self.db.get_status_counts()
             
             return {
                 'status': 'healthy',
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S'),
                 'database_connected': True,
                 'server_running': self.is_running,
                 'total_employees': total_employees
@@ -302,7 +311,7 @@ class HealthService:
             logger.error(f"Health status check failed: {e}")
             return {
                 'status': 'unhealthy',
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'timestamp': datetime.now(_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S'),
                 'database_connected': False,
                 'server_running': self.is_running,
                 'error': str(e)
@@ -6,10 +6,15 @@ This module handles scheduled notifications, daily summaries, and alert services
 
 import asyncio
 import logging
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+from time import monotonic
 from typing import Optional
 
+import aiohttp
+import pytz
+
 from telegram import Bot
+from telegram.request import HTTPXRequest
 
 from ..core.database import AttendanceDatabase
 from ..core.config import Config
@@ -17,6 +22,63 @@ from ..utils.messages import MessageFormatter
 
 logger = logging.getLogger(__name__)
 
+# Reminder bodies are invariant apart from the employee name, so build
+# them once at import instead of per recipient per run
+_LATE_REMINDER_TEMPLATE = (
+    "Good morning {name}!\n\n"
+    "⏰ **Attendance Reminder**\n\n"
+    "You haven't checked in today yet. Please share your location "
+    "using the 'Check In' button to record your attendance.\n\n"
+    "🔒 Location sharing is required for security."
+)
+
+_CHECKOUT_REMINDER_TEMPLATE = (
+    "Hi {name}!\n\n"
+    "🏁 **Check-Out Reminder**\n\n"
+    "Don't forget to check out before leaving! Please share your "
+    "location using the 'Check Out' button to complete your workday.\n\n"
+    "🔒 Location sharing is required for security."
+)
+
+# Resolved once at import, same pattern as core.database and
+# utils.messages; also keeps the scheduler on Cairo time rather than
+# whatever the host clock is set to
+_TIMEZONE = pytz.timezone(Config.TIMEZONE)
+
+
+class _TokenBucket:
+    """
+    Minimal asyncio token bucket.
+
+    Telegram allows roughly 30 messages per second bot-wide; bursting
+    past that returns 429s whose retry-afters stall the scheduler far
+    longer than pacing the sends would.
+    """
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._allowance = rate
+        self._last = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a send token is available."""
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._allowance = min(
+                    self.rate,
+                    self._allowance + (now - self._last) * (self.rate / self.period)
+                )
+                self._last = now
+                if self._allowance >= 1.0:
+                    self._allowance -= 1.0
+                    return
+                await asyncio.sleep(
+                    (1.0 - self._allowance) * self.period / self.rate
+                )
+
 
 class NotificationService:
     """
@@ -34,62 +96,136 @@ class NotificationService:
             db: Database instance
             message_formatter: Message formatter instance
         """
-        self.bot = Bot(token=bot_token)
+        # Persistent pooled transport; the default Bot request object
+        # allows so few parallel connections that gather fan-outs end up
+        # serialized waiting on the pool
+        self.bot = Bot(
+            token=bot_token,
+            request=HTTPXRequest(
+                connection_pool_size=40,
+                connect_timeout=5.0,
+                read_timeout=10.0,
+                pool_timeout=5.0
+            )
+        )
         self.db = db
         self.message_formatter = message_formatter
         self.is_running = False
+        # Shared pacing for every outbound message; stays safely under
+        # Telegram's ~30 msg/s global ceiling even with gather fan-outs
+        self._send_bucket = _TokenBucket(25.0)
+        # Notification-log rows collected during a fan-out and flushed
+        # with one executemany instead of a commit per message
+        self._pending_logs = []
+        self._tasks = []
         
         logger.info("Notification service initialized")
     
     async def run_scheduler(self) -> None:
         """
         Run the notification scheduler.
-        
-        This method runs continuously and checks for scheduled notifications.
+
+        Each cadence sleeps until its exact next fire time instead of
+        waking every minute and comparing wall-clock equality, so a slow
+        iteration can no longer skip a whole day's notification.
         """
         self.is_running = True
         logger.info("Notification scheduler started")
-        
+
+        self._tasks = [
+            asyncio.create_task(self._run_daily(time(20, 0), self._send_daily_summary)),
+            asyncio.create_task(self._run_daily(time(9, 30), self._send_late_reminders)),
+            asyncio.create_task(self._run_daily(time(18, 0), self._send_missed_checkout_reminders)),
+        ]
+        if Config.ENABLE_SERVER_WAKEUP:
+            self._tasks.append(
+                asyncio.create_task(self._run_interval(14 * 60, self._send_health_ping))
+            )
+
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            logger.info("Notification scheduler cancelled")
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self.is_running = False
+            logger.info("Notification scheduler stopped")
+
+    async def _run_daily(self, fire_at: time, job) -> None:
+        """Run job once per day at fire_at local time."""
         while self.is_running:
+            now = datetime.now(_TIMEZONE)
+            target = now.replace(hour=fire_at.hour, minute=fire_at.minute,
+                                 second=0, microsecond=0)
+            if target <= now:
+                target += timedelta(days=1)
+            await asyncio.sleep((target - now).total_seconds())
+            if not self.is_running:
+                break
             try:
-                current_time = datetime.now()
-                current_hour = current_time.hour
-                current_minute = current_time.minute
-                
-                # Daily summary at 8 PM (20:00)
-                if current_hour == 20 and current_minute == 0:
-                    await self._send_daily_summary()
-                
-                # Late check-in reminders at 9:30 AM (optional)
-                elif current_hour == 9 and current_minute == 30:
-                    await self._send_late_reminders()
-                
-                # Missed checkout reminders at 6 PM (18:00)
-                elif current_hour == 18 and current_minute == 0:
-                    await self._send_missed_checkout_reminders()
-                
-                # Health check ping (if enabled) - every 14 minutes
-                elif current_minute % 14 == 0 and Config.ENABLE_SERVER_WAKEUP:
-                    await self._send_health_ping()
-                
-                # Wait 60 seconds before next check
-                await asyncio.sleep(60)
-                
-            except asyncio.CancelledError:
-                logger.info("Notification scheduler cancelled")
+                await job()
+            except Exception as e:
+                logger.error(f"Error in scheduled job {job.__name__}: {e}")
+
+    async def _run_interval(self, interval_s: float, job) -> None:
+        """Run job every interval_s seconds."""
+        while self.is_running:
+            await asyncio.sleep(interval_s)
+            if not self.is_running:
                 break
+            try:
+                await job()
             except Exception as e:
-                logger.error(f"Error in notification scheduler: {e}")
-                await asyncio.sleep(60)  # Continue after error
-        
-        self.is_running = False
-        logger.info("Notification scheduler stopped")
-    
+                logger.error(f"Error in scheduled job {job.__name__}: {e}")
+
     def stop(self) -> None:
         """Stop the notification scheduler."""
         self.is_running = False
+        for task in self._tasks:
+            task.cancel()
         logger.info("Notification scheduler stop requested")
     
+    async def _send_logged(self, chat_id: int, text: str,
+                           notification_type: str, log_detail: str) -> bool:
+        """Send one message and log it, swallowing per-recipient errors.
+
+        Returns True on success so gather callers can sum the results.
+        """
+        try:
+            await self._send_bucket.acquire()
+            await self.bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode='Markdown'
+            )
+            self._pending_logs.append(
+                (chat_id, notification_type, log_detail, 'sent',
+                 datetime.now(_TIMEZONE).replace(tzinfo=None))
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send {notification_type} to {chat_id}: {e}")
+            return False
+    
+    async def _flush_logs(self) -> None:
+        """Write the batch's notification-log rows in one transaction."""
+        if self._pending_logs:
+            rows, self._pending_logs = self._pending_logs, []
+            await asyncio.to_thread(self.db.log_notifications_batch, rows)
+    
+    async def _fan_out(self, chat_ids, text: str,
+                       notification_type: str, log_detail: str) -> int:
+        """Send the same message to many chats concurrently."""
+        if not chat_ids:
+            return 0
+        results = await asyncio.gather(*(
+            self._send_logged(chat_id, text, notification_type, log_detail)
+            for chat_id in chat_ids
+        ))
+        await self._flush_logs()
+        return sum(results)
+    
     async def _send_daily_summary(self) -> None:
         """Send daily summary to all admins."""
         try:
@@ -100,29 +236,17 @@ class NotificationService:
             summary_message = self.message_formatter.format_daily_summary(summary_data)
             
             # Get all admins
-            admins = self.db.get_all_admins_for_daily_summary()
+            admins = self.db.get_all_admins()
             
             if not admins:
                 logger.warning("No admins found for daily summary")
                 return
             
-            # Send to each admin
-            success_count = 0
-            for admin_id in admins:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin_id,
-                        text=summary_message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    logger.info(f"Daily summary sent to admin {admin_id}")
-                    
-                    # Log notification
-                    self.db.log_notification(admin_id, 'daily_summary', 'Daily summary sent')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send daily summary to admin {admin_id}: {e}")
+            # All sends are independent network calls; put them in
+            # flight together instead of paying one round-trip each
+            success_count = await self._fan_out(
+                admins, summary_message, 'daily_summary', 'Daily summary sent'
+            )
             
             logger.info(f"Daily summary sent to {success_count}/{len(admins)} admins")
             
@@ -140,50 +264,26 @@ class NotificationService:
         try:
             logger.info("Checking for late employees")
             
-            # Get employees who should have checked in by now
-            all_employees = self.db.get_all_employees()
-            late_employees = []
-            
-            for employee in all_employees:
-                telegram_id = employee[0]
-                status = self.db.get_attendance_status(telegram_id)
-                
-                # If no check-in today, they're late
-                if not status or not status[0]:  # No check_in_time
-                    late_employees.append(employee)
+            # One LEFT JOIN resolves everyone's status for today instead
+            # of a status query per employee
+            targets = await asyncio.to_thread(self.db.get_employees_for_reminders)
+            late_employees = [t for t in targets if t[2] == 'checkin']
             
             if not late_employees:
                 logger.info("No late employees found")
                 return
             
-            # Send reminders
-            reminder_message = (
-                "⏰ **Attendance Reminder**\n\n"
-                "You haven't checked in today yet. Please share your location "
-                "using the 'Check In' button to record your attendance.\n\n"
-                "🔒 Location sharing is required for security."
-            )
-            
-            success_count = 0
-            for employee in late_employees:
-                telegram_id = employee[0]
-                first_name = employee[2]
-                
-                try:
-                    personalized_message = f"Good morning {first_name}!\n\n{reminder_message}"
-                    
-                    await self.bot.send_message(
-                        chat_id=telegram_id,
-                        text=personalized_message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    
-                    # Log notification
-                    self.db.log_notification(telegram_id, 'late_reminder', 'Late check-in reminder sent')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send reminder to employee {telegram_id}: {e}")
+            results = await asyncio.gather(*(
+                self._send_logged(
+                    telegram_id,
+                    _LATE_REMINDER_TEMPLATE.format(
+                        name=self.message_formatter.escape_markdown(first_name)),
+                    'late_reminder', 'Late check-in reminder sent'
+                )
+                for telegram_id, first_name, _ in late_employees
+            ))
+            await self._flush_logs()
+            success_count = sum(results)
             
             logger.info(f"Late reminders sent to {success_count}/{len(late_employees)} employees")
             
@@ -195,50 +295,26 @@ class NotificationService:
         try:
             logger.info("Checking for employees who haven't checked out")
             
-            # Get employees who checked in but haven't checked out
-            all_employees = self.db.get_all_employees()
-            missed_checkout_employees = []
-            
-            for employee in all_employees:
-                telegram_id = employee[0]
-                status = self.db.get_attendance_status(telegram_id)
-                
-                # If checked in but not checked out
-                if status and status[0] and not status[1]:  # check_in_time exists, check_out_time doesn't
-                    missed_checkout_employees.append(employee)
+            # One LEFT JOIN resolves everyone's status for today instead
+            # of a status query per employee
+            targets = await asyncio.to_thread(self.db.get_employees_for_reminders)
+            missed_checkout_employees = [t for t in targets if t[2] == 'checkout']
             
             if not missed_checkout_employees:
                 logger.info("No employees with missed checkout found")
                 return
             
-            # Send reminders
-            reminder_message = (
-                "🏁 **Check-Out Reminder**\n\n"
-                "Don't forget to check out before leaving! Please share your "
-                "location using the 'Check Out' button to complete your workday.\n\n"
-                "🔒 Location sharing is required for security."
-            )
-            
-            success_count = 0
-            for employee in missed_checkout_employees:
-                telegram_id = employee[0]
-                first_name = employee[2]
-                
-                try:
-                    personalized_message = f"Hi {first_name}!\n\n{reminder_message}"
-                    
-                    await self.bot.send_message(
-                        chat_id=telegram_id,
-                        text=personalized_message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    
-                    # Log notification
-                    self.db.log_notification(telegram_id, 'checkout_reminder', 'Check-out reminder sent')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send checkout reminder to employee {telegram_id}: {e}")
+            results = await asyncio.gather(*(
+                self._send_logged(
+                    telegram_id,
+                    _CHECKOUT_REMINDER_TEMPLATE.format(
+                        name=self.message_formatter.escape_markdown(first_name)),
+                    'checkout_reminder', 'Check-out reminder sent'
+                )
+                for telegram_id, first_name, _ in missed_checkout_employees
+            ))
+            await self._flush_logs()
+            success_count = sum(results)
             
             logger.info(f"Checkout reminders sent to {success_count}/{len(missed_checkout_employees)} employees")
             
@@ -251,8 +327,6 @@ class NotificationService:
             if not Config.SERVER_URL:
                 return
             
-            import aiohttp
-            
             async with aiohttp.ClientSession() as session:
                 try:
                     async with session.get(f"{Config.SERVER_URL}/health", timeout=30) as response:
@@ -282,36 +356,25 @@ class NotificationService:
             reason: Reason for being late (if provided)
         """
         try:
-            message = f"🕐 **Late Arrival Alert**\n\n"
-            message += f"**Employee:** {employee_name}\n"
-            message += f"**ID:** `{employee_id}`\n"
-            message += f"**Check-in Time:** {check_in_time}\n"
-            
+            # Assemble fragments and join once, as the report builders do
+            parts = [
+                "🕐 **Late Arrival Alert**\n\n",
+                f"**Employee:** {self.message_formatter.escape_markdown(employee_name)}\n",
+                f"**ID:** `{employee_id}`\n",
+                f"**Check-in Time:** {check_in_time}\n",
+            ]
             if reason:
-                message += f"**Reason:** {reason}\n"
+                parts.append(f"**Reason:** {self.message_formatter.escape_markdown(reason)}\n")
             else:
-                message += f"**Reason:** Not provided\n"
-            
-            message += f"\n⚠️ This employee checked in after the standard work start time."
+                parts.append("**Reason:** Not provided\n")
+            parts.append("\n⚠️ This employee checked in after the standard work start time.")
+            message = ''.join(parts)
             
-            # Get all admins
             admins = self.db.get_all_admins()
             
-            success_count = 0
-            for admin_id in admins:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin_id,
-                        text=message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    
-                    # Log notification
-                    self.db.log_notification(admin_id, 'late_alert', f'Late alert for employee {employee_id}')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send late alert to admin {admin_id}: {e}")
+            success_count = await self._fan_out(
+                admins, message, 'late_alert', f'Late alert for employee {employee_id}'
+            )
             
             logger.info(f"Late alert sent to {success_count} admins for employee {employee_id}")
             
@@ -330,36 +393,26 @@ class NotificationService:
             reason: Reason for early departure (if provided)
         """
         try:
-            message = f"🕕 **Early Departure Alert**\n\n"
-            message += f"**Employee:** {employee_name}\n"
-            message += f"**ID:** `{employee_id}`\n"
-            message += f"**Check-out Time:** {check_out_time}\n"
-            
+            # Assemble fragments and join once, as the report builders do
+            parts = [
+                "🕕 **Early Departure Alert**\n\n",
+                f"**Employee:** {self.message_formatter.escape_markdown(employee_name)}\n",
+                f"**ID:** `{employee_id}`\n",
+                f"**Check-out Time:** {check_out_time}\n",
+            ]
             if reason:
-                message += f"**Reason:** {reason}\n"
+                parts.append(f"**Reason:** {self.message_formatter.escape_markdown(reason)}\n")
             else:
-                message += f"**Reason:** Not provided\n"
+                parts.append("**Reason:** Not provided\n")
+            parts.append("\n⚠️ This employee checked out before the standard work end time.")
+            message = ''.join(parts)
             
-            message += f"\n⚠️ This employee checked out before the standard work end time."
-            
-            # Get all admins
             admins = self.db.get_all_admins()
             
-            success_count = 0
-            for admin_id in admins:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin_id,
-                        text=message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    
-                    # Log notification
-                    self.db.log_notification(admin_id, 'early_departure_alert', f'Early departure alert for employee {employee_id}')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send early departure alert to admin {admin_id}: {e}")
+            success_count = await self._fan_out(
+                admins, message, 'early_departure_alert',
+                f'Early departure alert for employee {employee_id}'
+            )
             
             logger.info(f"Early departure alert sent to {success_count} admins for employee {employee_id}")
             
@@ -379,6 +432,7 @@ class NotificationService:
             bool: True if successful, False otherwise
         """
         try:
+            await self._send_bucket.acquire()
             await self.bot.send_message(
                 chat_id=admin_id,
                 text=message,
@@ -408,24 +462,15 @@ class NotificationService:
         """
         try:
             employees = self.db.get_all_employees()
-            success_count = 0
-            
-            for employee in employees:
-                telegram_id = employee[0]
-                
-                try:
-                    await self.bot.send_message(
-                        chat_id=telegram_id,
-                        text=message,
-                        parse_mode='Markdown'
-                    )
-                    success_count += 1
-                    
-                    # Log notification
-                    self.db.log_notification(telegram_id, notification_type, message[:100])
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send broadcast to employee {telegram_id}: {e}")
+            results = await asyncio.gather(*(
+                self._send_logged(
+                    employee['telegram_id'], message,
+                    notification_type, message[:100]
+                )
+                for employee in employees
+            ))
+            await self._flush_logs()
+            success_count = sum(results)
             
             logger.info(f"Broadcast sent to {success_count}/{len(employees)} employees")
             return success_count
@@ -9,6 +9,73 @@ from telegram import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup,
 
 from ..core.config import Config
 
+# Keyboard markup objects are immutable once built, and every variant
+# below is fixed at import time; build each one once and hand out the
+# shared instance instead of reallocating buttons per reply
+_STATUS_ROW = [KeyboardButton("📊 My Status"), KeyboardButton("📈 My Report")]
+_HELP_ROW = [KeyboardButton("ℹ️ Help")]
+
+_CHECKED_IN_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("🔴 Check Out", request_location=True)],
+     _STATUS_ROW, _HELP_ROW],
+    resize_keyboard=True,
+    one_time_keyboard=False
+)
+_CHECKED_OUT_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("🟢 Check In", request_location=True)],
+     _STATUS_ROW, _HELP_ROW],
+    resize_keyboard=True,
+    one_time_keyboard=False
+)
+_REGISTRATION_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("📝 Register", request_contact=True)]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+_CONTACT_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("📱 Share Contact", request_contact=True)]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+_ADMIN_MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📊 Today's Report", callback_data="admin_today_report"),
+        InlineKeyboardButton("👥 All Employees", callback_data="admin_all_employees")
+    ],
+    [
+        InlineKeyboardButton("📅 Exceptional Hours", callback_data="admin_exceptional_hours"),
+        InlineKeyboardButton("📈 Analytics", callback_data="admin_analytics")
+    ],
+    [
+        InlineKeyboardButton("⚙️ Settings", callback_data="admin_settings"),
+        InlineKeyboardButton("🖥️ Server Status", callback_data="admin_server_status")
+    ]
+])
+_ADMIN_SETTINGS_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔔 Alert Settings", callback_data="admin_alert_settings"),
+        InlineKeyboardButton("👨‍💼 Manage Admins", callback_data="admin_manage_admins")
+    ],
+    [
+        InlineKeyboardButton("📊 Report Settings", callback_data="admin_report_settings"),
+        InlineKeyboardButton("🔧 System Config", callback_data="admin_system_config")
+    ],
+    [
+        InlineKeyboardButton("« Back to Main", callback_data="admin_main_menu")
+    ]
+])
+_QUICK_ACTION_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔄 Refresh Report", callback_data="admin_refresh"),
+        InlineKeyboardButton("📤 Send Summary", callback_data="admin_send_summary")
+    ],
+    [
+        InlineKeyboardButton("📋 Export Data", callback_data="admin_export"),
+        InlineKeyboardButton("🧹 Cleanup", callback_data="admin_cleanup")
+    ]
+])
+
 
 class KeyboardBuilder:
     """
@@ -28,24 +95,7 @@ class KeyboardBuilder:
         Returns:
             ReplyKeyboardMarkup with location sharing buttons
         """
-        if is_checked_in:
-            keyboard = [
-                [KeyboardButton("🔴 Check Out", request_location=True)],
-                [KeyboardButton("📊 My Status"), KeyboardButton("📈 My Report")],
-                [KeyboardButton("ℹ️ Help")]
-            ]
-        else:
-            keyboard = [
-                [KeyboardButton("🟢 Check In", request_location=True)],
-                [KeyboardButton("📊 My Status"), KeyboardButton("📈 My Report")],
-                [KeyboardButton("ℹ️ Help")]
-            ]
-        
-        return ReplyKeyboardMarkup(
-            keyboard,
-            resize_keyboard=True,
-            one_time_keyboard=False
-        )
+        return _CHECKED_IN_KEYBOARD if is_checked_in else _CHECKED_OUT_KEYBOARD
     
     @staticmethod
     def get_registration_keyboard() -> ReplyKeyboardMarkup:
@@ -55,12 +105,7 @@ class KeyboardBuilder:
         Returns:
             ReplyKeyboardMarkup with contact sharing button
         """
-        keyboard = [[KeyboardButton("📝 Register", request_contact=True)]]
-        return ReplyKeyboardMarkup(
-            keyboard,
-            resize_keyboard=True,
-            one_time_keyboard=True
-        )
+        return _REGISTRATION_KEYBOARD
     
     @staticmethod
     def get_contact_keyboard() -> ReplyKeyboardMarkup:
@@ -70,12 +115,7 @@ class KeyboardBuilder:
         Returns:
             ReplyKeyboardMarkup with contact sharing button
         """
-        keyboard = [[KeyboardButton("📱 Share Contact", request_contact=True)]]
-        return ReplyKeyboardMarkup(
-            keyboard,
-            resize_keyboard=True,
-            one_time_keyboard=True
-        )
+        return _CONTACT_KEYBOARD
     
     @staticmethod
     def get_admin_main_keyboard() -> InlineKeyboardMarkup:
@@ -85,22 +125,7 @@ class KeyboardBuilder:
         Returns:
             InlineKeyboardMarkup with admin options
         """
-        keyboard = [
-            [
-                InlineKeyboardButton("📊 Today's Report", callback_data="admin_today_report"),
-                InlineKeyboardButton("👥 All Employees", callback_data="admin_all_employees")
-            ],
-            [
-                InlineKeyboardButton("📅 Exceptional Hours", callback_data="admin_exceptional_hours"),
-                InlineKeyboardButton("📈 Analytics", callback_data="admin_analytics")
-            ],
-            [
-                InlineKeyboardButton("⚙️ Settings", callback_data="admin_settings"),
-                InlineKeyboardButton("🖥️ Server Status", callback_data="admin_server_status")
-            ]
-        ]
-        
-        return InlineKeyboardMarkup(keyboard)
+        return _ADMIN_MAIN_KEYBOARD
     
     @staticmethod
     def get_admin_settings_keyboard() -> InlineKeyboardMarkup:
@@ -110,21 +135,7 @@ class KeyboardBuilder:
         Returns:
             InlineKeyboardMarkup with settings options
         """
-        keyboard = [
-            [
-                InlineKeyboardButton("🔔 Alert Settings", callback_data="admin_alert_settings"),
-                InlineKeyboardButton("👨‍💼 Manage Admins", callback_data="admin_manage_admins")
-            ],
-            [
-                InlineKeyboardButton("📊 Report Settings", callback_data="admin_report_settings"),
-                InlineKeyboardButton("🔧 System Config", callback_data="admin_system_config")
-            ],
-            [
-                InlineKeyboardButton("« Back to Main", callback_data="admin_main_menu")
-            ]
-        ]
-        
-        return InlineKeyboardMarkup(keyboard)
+        return _ADMIN_SETTINGS_KEYBOARD
     
     @staticmethod
     def get_confirmation_keyboard(confirm_data: str, cancel_data: str = "cancel") -> InlineKeyboardMarkup:
@@ -215,15 +226,4 @@ class KeyboardBuilder:
         Returns:
             InlineKeyboardMarkup with quick actions
         """
-        keyboard = [
-            [
-                InlineKeyboardButton("🔄 Refresh Report", callback_data="admin_refresh"),
-                InlineKeyboardButton("📤 Send Summary", callback_data="admin_send_summary")
-            ],
-            [
-                InlineKeyboardButton("📋 Export Data", callback_data="admin_export"),
-                InlineKeyboardButton("🧹 Cleanup", callback_data="admin_cleanup")
-            ]
-        ]
-        
-        return InlineKeyboardMarkup(keyboard) 
\ No newline at end of file
+        return _QUICK_ACTION_KEYBOARD 
\ No newline at end of file
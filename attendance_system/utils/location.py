@@ -5,13 +5,22 @@ This module provides location validation and distance calculation functionality.
 """
 
 import logging
+import math
 from typing import Tuple
-from geopy.distance import geodesic
 
 from ..core.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Mean Earth radius in meters (IUGG)
+EARTH_RADIUS_M = 6371008.8
+
+# Office geometry is fixed for the life of the process, so do the
+# degree-to-radian conversions once at import rather than per instance
+_OFFICE_LAT_RAD = math.radians(Config.OFFICE_LATITUDE)
+_OFFICE_LON_RAD = math.radians(Config.OFFICE_LONGITUDE)
+_COS_OFFICE_LAT = math.cos(_OFFICE_LAT_RAD)
+
 
 class LocationValidator:
     """
@@ -26,22 +35,31 @@ class LocationValidator:
         self.office_lon = Config.OFFICE_LONGITUDE
         self.office_radius = Config.OFFICE_RADIUS
         self.office_coords = (self.office_lat, self.office_lon)
-    
+        # Radian coordinates for the equirectangular distance
+        # approximation, computed once at module import
+        self._office_lat_rad = _OFFICE_LAT_RAD
+        self._office_lon_rad = _OFFICE_LON_RAD
+        self._cos_office_lat = _COS_OFFICE_LAT
+
     def calculate_distance(self, latitude: float, longitude: float) -> float:
         """
         Calculate distance from office in meters.
-        
+
+        Uses the equirectangular approximation, which is accurate to
+        well under a meter at the ~100m scale of the office radius and
+        avoids geopy's geodesic solver on the check-in hot path.
+
         Args:
             latitude: Location latitude
             longitude: Location longitude
-            
+
         Returns:
             Distance in meters
         """
         try:
-            user_coords = (latitude, longitude)
-            distance = geodesic(self.office_coords, user_coords).meters
-            return distance
+            dlat = math.radians(latitude) - self._office_lat_rad
+            dlon = (math.radians(longitude) - self._office_lon_rad) * self._cos_office_lat
+            return math.hypot(dlat, dlon) * EARTH_RADIUS_M
         except Exception as e:
             logger.error(f"Error calculating distance: {e}")
             return float('inf')  # Return infinite distance on error
@@ -57,6 +75,11 @@ class LocationValidator:
         Returns:
             Tuple of (is_within_radius, distance_in_meters)
         """
+        # No bounding-box or squared-distance pre-check here: the
+        # equirectangular distance is already just two multiplies and a
+        # hypot, and callers need the exact meter value on both paths —
+        # denial messages display it and attendance rows store it — so
+        # deferring the sqrt would never actually skip it
         distance = self.calculate_distance(latitude, longitude)
         is_within = distance <= self.office_radius
         
@@ -97,6 +120,10 @@ def is_within_radius(user_lat: float, user_lon: float,
     """
     Legacy function for backward compatibility.
     
+    Uses the same equirectangular approximation as LocationValidator;
+    the cosine is computed per call because the office coordinates are
+    caller-supplied here.
+    
     Args:
         user_lat: User latitude
         user_lon: User longitude
@@ -108,9 +135,10 @@ def is_within_radius(user_lat: float, user_lon: float,
         Tuple of (is_within_radius, distance_in_meters)
     """
     try:
-        user_coords = (user_lat, user_lon)
-        office_coords = (office_lat, office_lon)
-        distance = geodesic(office_coords, user_coords).meters
+        office_lat_rad = math.radians(office_lat)
+        dlat = math.radians(user_lat) - office_lat_rad
+        dlon = math.radians(user_lon - office_lon) * math.cos(office_lat_rad)
+        distance = math.hypot(dlat, dlon) * EARTH_RADIUS_M
         return distance <= radius_meters, distance
     except Exception as e:
         logger.error(f"Error in legacy location check: {e}")
@@ -5,11 +5,140 @@ This module provides message formatting and templates for consistent messaging.
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 import pytz
 
 from ..core.config import Config
 
+# Resolve the configured timezone once at import; pytz.timezone() is a
+# registry lookup that handlers would otherwise repeat per formatter.
+_TIMEZONE = pytz.timezone(Config.TIMEZONE)
+
+# Static skeleton of the daily summary, composed once at import; only
+# the numbers are substituted per report.
+_DAILY_SUMMARY_TEMPLATE = """
+📊 **Daily Attendance Summary - {date}**
+
+👥 **Overview:**
+• Total Employees: {total_employees}
+• Checked In Today: {checked_in}
+• Checked Out Today: {checked_out}
+• Still Working: {still_working}
+
+⏰ **Issues:**
+• Late Check-ins: {late_checkins}
+• Early Check-outs: {early_checkouts}
+
+📈 **Attendance Rate: {attendance_rate:.1f}%**
+"""
+
+# Translation table for user-supplied text embedded in Markdown
+# messages; built once at import instead of chained .replace() calls
+# (or a regex) per message.
+# Every error body except "general" is a fixed literal; build the dict
+# once at import instead of re-synthesizing multi-line strings per call
+_ERROR_MESSAGES = {
+    "location_required": """
+📍 **Location Required**
+
+Please use the location sharing button to check in/out.
+Manual entry is not allowed for security reasons.
+
+🔒 This ensures accurate attendance tracking.
+""",
+    "not_registered": """
+❌ **Registration Required**
+
+Please register first using the /register command or the Register button.
+""",
+    "already_checked_in": """
+⚠️ **Already Checked In**
+
+You are already checked in today. Use the Check Out button to complete your workday.
+""",
+    "not_checked_in": """
+⚠️ **Not Checked In**
+
+You haven't checked in today. Please check in first before checking out.
+""",
+    "admin_required": """
+❌ **Admin Privileges Required**
+
+This command is only available for administrators.
+""",
+}
+
+_GENERAL_ERROR_TEMPLATE = """
+⚠️ **System Error**
+
+An unexpected error occurred. Please try again.
+{details}
+
+If the problem persists, contact an administrator.
+"""
+
+# The welcome bodies only vary by first name; the office address and
+# radius are fixed at import, so bake them in once
+_WELCOME_BACK_TEMPLATE = f"""
+👋 **Welcome back, {{first_name}}!**
+
+🏢 **Office Location:** {Config.OFFICE_ADDRESS}
+📏 **Attendance Radius:** {Config.OFFICE_RADIUS}m
+
+✅ **Security Features:**
+🔒 Location sharing is MANDATORY
+🚫 Manual location entry is DISABLED
+
+Use the buttons below to check in/out or view your status.
+"""
+
+_WELCOME_NEW_TEMPLATE = """
+👋 **Welcome to Enhanced Attendance System!**
+
+Hello {first_name}! You need to register first to use this bot.
+
+📝 Please click the 'Register' button below to share your contact information.
+
+🔒 **Security Notice:** This system uses location-only attendance tracking for enhanced security.
+"""
+
+_MARKDOWN_ESCAPE = str.maketrans({c: '\\' + c for c in '_*`['})
+
+# Static skeletons for the hot check-in/out replies; only the dynamic
+# fields are interpolated at send time
+_CHECK_IN_TEMPLATE = """
+✅ **Check-In Successful!**
+
+⏰ **Time:** {time_str}
+📍 **Distance from office:** {distance:.0f}m
+🌐 **Security:** Location verified
+"""
+
+# The office radius and address are fixed at startup, so the denial
+# message is constant except for the measured distance; %-formatting a
+# single float is cheaper than re-rendering the whole f-string
+_LOCATION_DENIED_TEMPLATE = f"""
+❌ **Location Verification Failed**
+
+You are %.0fm away from the office.
+Attendance is ONLY allowed within {Config.OFFICE_RADIUS}m of the office.
+
+🏢 **Office Location:** {Config.OFFICE_ADDRESS}
+📱 Please move closer and try again.
+
+⚠️ **Security Notice:** Manual location entry is disabled for security.
+"""
+
+_CHECK_OUT_TEMPLATE = """
+✅ **Check-Out Successful!**
+
+⏰ **Time:** {time_str}
+⏱️ **Work Duration:** {hours}h {minutes}m
+📍 **Distance from office:** {distance:.0f}m
+🌐 **Security:** Location verified
+"""
+
 
 class MessageFormatter:
     """
@@ -20,7 +149,14 @@ class MessageFormatter:
     
     def __init__(self):
         """Initialize message formatter."""
-        self.timezone = pytz.timezone(Config.TIMEZONE)
+        self.timezone = _TIMEZONE
+
+    @staticmethod
+    def escape_markdown(text: Optional[str]) -> Optional[str]:
+        """Escape Markdown control characters in user-supplied text."""
+        if not text:
+            return text
+        return text.translate(_MARKDOWN_ESCAPE)
     
     def format_welcome_message(self, first_name: str, is_registered: bool = False) -> str:
         """
@@ -34,28 +170,9 @@ class MessageFormatter:
             Formatted welcome message
         """
         if is_registered:
-            return f"""
-👋 **Welcome back, {first_name}!**
-
-🏢 **Office Location:** {Config.OFFICE_ADDRESS}
-📏 **Attendance Radius:** {Config.OFFICE_RADIUS}m
-
-✅ **Security Features:**
-🔒 Location sharing is MANDATORY
-🚫 Manual location entry is DISABLED
-
-Use the buttons below to check in/out or view your status.
-"""
+            return _WELCOME_BACK_TEMPLATE.format(first_name=first_name)
         else:
-            return f"""
-👋 **Welcome to Enhanced Attendance System!**
-
-Hello {first_name}! You need to register first to use this bot.
-
-📝 Please click the 'Register' button below to share your contact information.
-
-🔒 **Security Notice:** This system uses location-only attendance tracking for enhanced security.
-"""
+            return _WELCOME_NEW_TEMPLATE.format(first_name=first_name)
     
     def format_check_in_success(self, time_str: str, distance: float, 
                               is_late: bool = False, late_reason: Optional[str] = None) -> str:
@@ -71,13 +188,7 @@ Hello {first_name}! You need to register first to use this bot.
         Returns:
             Formatted check-in message
         """
-        message = f"""
-✅ **Check-In Successful!**
-
-⏰ **Time:** {time_str}
-📍 **Distance from office:** {distance:.0f}m
-🌐 **Security:** Location verified
-"""
+        message = _CHECK_IN_TEMPLATE.format(time_str=time_str, distance=distance)
         
         if is_late:
             message += f"\n⏰ **Late Check-in**"
@@ -104,17 +215,15 @@ Hello {first_name}! You need to register first to use this bot.
         Returns:
             Formatted check-out message
         """
-        hours, remainder = divmod(work_duration.total_seconds(), 3600)
+        # Pure integer math; total_seconds() goes through float
+        secs = work_duration.days * 86400 + work_duration.seconds
+        hours, remainder = divmod(secs, 3600)
         minutes = remainder // 60
         
-        message = f"""
-✅ **Check-Out Successful!**
-
-⏰ **Time:** {time_str}
-⏱️ **Work Duration:** {int(hours)}h {int(minutes)}m
-📍 **Distance from office:** {distance:.0f}m
-🌐 **Security:** Location verified
-"""
+        message = _CHECK_OUT_TEMPLATE.format(
+            time_str=time_str, hours=hours, minutes=minutes,
+            distance=distance
+        )
         
         if is_early:
             message += f"\n⏰ **Early Check-out**"
@@ -135,17 +244,7 @@ Hello {first_name}! You need to register first to use this bot.
         Returns:
             Formatted denial message
         """
-        return f"""
-❌ **Location Verification Failed**
-
-You are {distance:.0f}m away from the office.
-Attendance is ONLY allowed within {Config.OFFICE_RADIUS}m of the office.
-
-🏢 **Office Location:** {Config.OFFICE_ADDRESS}
-📱 Please move closer and try again.
-
-⚠️ **Security Notice:** Manual location entry is disabled for security.
-"""
+        return _LOCATION_DENIED_TEMPLATE % distance
     
     def format_attendance_status(self, status_data: Dict[str, Any], date_str: str) -> str:
         """
@@ -174,34 +273,37 @@ Attendance is ONLY allowed within {Config.OFFICE_RADIUS}m of the office.
         
         message = f"📊 **Attendance Status - {date_str}**\n\n"
         
+        # ISO timestamps carry HH:MM:SS at a fixed offset; slice the
+        # display values out instead of parsing and re-formatting them
         if check_in_time:
-            check_in_dt = datetime.fromisoformat(check_in_time)
-            message += f"✅ Checked in: {check_in_dt.strftime('%H:%M:%S')}"
+            message += f"✅ Checked in: {check_in_time[11:19]}"
             if is_late:
                 message += " (⏰ Late)"
             message += "\n"
         
         if check_out_time:
-            check_out_dt = datetime.fromisoformat(check_out_time)
-            message += f"✅ Checked out: {check_out_dt.strftime('%H:%M:%S')}"
+            message += f"✅ Checked out: {check_out_time[11:19]}"
             if is_early:
                 message += " (⏰ Early)"
             message += "\n"
             
             # Calculate duration
             if check_in_time:
-                duration = check_out_dt - check_in_dt
-                hours, remainder = divmod(duration.total_seconds(), 3600)
+                duration = (datetime.fromisoformat(check_out_time)
+                            - datetime.fromisoformat(check_in_time))
+                secs = duration.days * 86400 + duration.seconds
+                hours, remainder = divmod(secs, 3600)
                 minutes = remainder // 60
-                message += f"⏱️ Work duration: {int(hours)}h {int(minutes)}m"
+                message += f"⏱️ Work duration: {hours}h {minutes}m"
         elif check_in_time:
-            current_time = datetime.now(self.timezone)
+            current_time = datetime.now(_TIMEZONE)
             check_in_dt = datetime.fromisoformat(check_in_time)
             duration = current_time - check_in_dt
-            hours, remainder = divmod(duration.total_seconds(), 3600)
+            secs = duration.days * 86400 + duration.seconds
+            hours, remainder = divmod(secs, 3600)
             minutes = remainder // 60
             message += f"⏳ Currently working\n"
-            message += f"⏱️ Duration so far: {int(hours)}h {int(minutes)}m"
+            message += f"⏱️ Duration so far: {hours}h {minutes}m"
         
         return message
     
@@ -223,52 +325,57 @@ Attendance is ONLY allowed within {Config.OFFICE_RADIUS}m of the office.
         early_checkouts = summary_data.get('early_checkouts', 0)
         attendance_rate = summary_data.get('attendance_rate', 0)
         
-        message = f"""
-📊 **Daily Attendance Summary - {date}**
-
-👥 **Overview:**
-• Total Employees: {total_employees}
-• Checked In Today: {checked_in}
-• Checked Out Today: {checked_out}
-• Still Working: {checked_in - checked_out}
-
-⏰ **Issues:**
-• Late Check-ins: {late_checkins}
-• Early Check-outs: {early_checkouts}
-
-📈 **Attendance Rate: {attendance_rate:.1f}%**
-"""
+        message = _DAILY_SUMMARY_TEMPLATE.format(
+            date=date,
+            total_employees=total_employees,
+            checked_in=checked_in,
+            checked_out=checked_out,
+            still_working=checked_in - checked_out,
+            late_checkins=late_checkins,
+            early_checkouts=early_checkouts,
+            attendance_rate=attendance_rate
+        )
+        
+        # Collect fragments and join once; growing a string per late or
+        # early employee copies the whole prefix on each append
+        parts = [message]
         
-        # Add late employees if any
         late_employees = summary_data.get('late_employees', [])
         if late_employees:
-            message += "\n🕐 **Late Arrivals:**\n"
+            parts.append("\n🕐 **Late Arrivals:**\n")
             for emp in late_employees:
-                name = f"{emp[0]} {emp[1] or ''}".strip()
-                check_in_time = datetime.fromisoformat(emp[2]).strftime('%H:%M')
-                reason = emp[3] if emp[3] else "No reason provided"
-                message += f"• {name} - {check_in_time} ({reason})\n"
+                name = self.escape_markdown(f"{emp[0]} {emp[1] or ''}".strip())
+                # Timestamps are ISO 'YYYY-MM-DD HH:MM:SS...'; slice out
+                # HH:MM directly instead of a full datetime round-trip
+                check_in_time = emp[2][11:16]
+                reason = self.escape_markdown(emp[3]) if emp[3] else "No reason provided"
+                parts.append(f"• {name} - {check_in_time} ({reason})\n")
         
-        # Add early checkouts if any
         early_employees = summary_data.get('early_employees', [])
         if early_employees:
-            message += "\n🕕 **Early Departures:**\n"
+            parts.append("\n🕕 **Early Departures:**\n")
             for emp in early_employees:
-                name = f"{emp[0]} {emp[1] or ''}".strip()
-                check_out_time = datetime.fromisoformat(emp[2]).strftime('%H:%M')
-                reason = emp[3] if emp[3] else "No reason provided"
-                message += f"• {name} - {check_out_time} ({reason})\n"
+                name = self.escape_markdown(f"{emp[0]} {emp[1] or ''}".strip())
+                check_out_time = emp[2][11:16]
+                reason = self.escape_markdown(emp[3]) if emp[3] else "No reason provided"
+                parts.append(f"• {name} - {check_out_time} ({reason})\n")
         
         # Add timestamp
         current_time = datetime.now(self.timezone)
-        message += f"\n🕘 Report generated at {current_time.strftime('%H:%M:%S')}"
+        parts.append(f"\n🕘 Report generated at {current_time.strftime('%H:%M:%S')}")
         
-        return message
+        return ''.join(parts)
     
-    def format_help_message(self, is_admin: bool = False, is_registered: bool = True) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def format_help_message(is_admin: bool = False, is_registered: bool = True) -> str:
         """
         Format comprehensive help message.
         
+        The text depends only on the two flags (plus Config constants fixed
+        at startup), so the four possible messages are built once and served
+        from cache on every subsequent /help.
+        
         Args:
             is_admin: Whether user is admin
             is_registered: Whether user is registered
@@ -344,46 +451,12 @@ Attendance is ONLY allowed within {Config.OFFICE_RADIUS}m of the office.
         Returns:
             Formatted error message
         """
-        messages = {
-            "location_required": """
-📍 **Location Required**
-
-Please use the location sharing button to check in/out.
-Manual entry is not allowed for security reasons.
-
-🔒 This ensures accurate attendance tracking.
-""",
-            "not_registered": """
-❌ **Registration Required**
-
-Please register first using the /register command or the Register button.
-""",
-            "already_checked_in": """
-⚠️ **Already Checked In**
-
-You are already checked in today. Use the Check Out button to complete your workday.
-""",
-            "not_checked_in": """
-⚠️ **Not Checked In**
-
-You haven't checked in today. Please check in first before checking out.
-""",
-            "admin_required": """
-❌ **Admin Privileges Required**
-
-This command is only available for administrators.
-""",
-            "general": f"""
-⚠️ **System Error**
-
-An unexpected error occurred. Please try again.
-{f"Details: {details}" if details else ""}
-
-If the problem persists, contact an administrator.
-"""
-        }
-        
-        return messages.get(error_type, messages["general"])
+        message = _ERROR_MESSAGES.get(error_type)
+        if message is not None:
+            return message
+        return _GENERAL_ERROR_TEMPLATE.format(
+            details=f"Details: {details}" if details else ""
+        )
     
     def format_conversation_prompt(self, prompt_type: str, context: Dict[str, Any]) -> str:
         """
@@ -27,6 +27,11 @@ def create_production_app():
     
     # Initialize bot instance
     bot_instance = None
+    # One persistent event loop in a dedicated thread serves the bot,
+    # the notification scheduler and every webhook update; spinning up
+    # a loop per request would rebuild HTTP sessions and drop updates
+    # under sync WSGI workers
+    bot_loop = asyncio.new_event_loop()
     
     def initialize_bot():
         """Initialize the bot in webhook mode"""
@@ -35,20 +40,20 @@ def create_production_app():
             from attendance_system.main import AttendanceBot
             bot_instance = AttendanceBot()
             
-            # Initialize the application but don't start polling
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(bot_instance.app.initialize())
-            loop.run_until_complete(bot_instance.app.start())
+            threading.Thread(target=bot_loop.run_forever, daemon=True).start()
             
-            # Start notification service in background
-            def start_notifications():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(bot_instance.notification_service.run_scheduler())
+            # Initialize the application but don't start polling
+            asyncio.run_coroutine_threadsafe(
+                bot_instance.app.initialize(), bot_loop
+            ).result(timeout=60)
+            asyncio.run_coroutine_threadsafe(
+                bot_instance.app.start(), bot_loop
+            ).result(timeout=60)
             
-            notification_thread = threading.Thread(target=start_notifications, daemon=True)
-            notification_thread.start()
+            # Notification scheduler shares the same loop
+            asyncio.run_coroutine_threadsafe(
+                bot_instance.notification_service.run_scheduler(), bot_loop
+            )
             
             print("✅ Bot initialized in webhook mode")
             return True
@@ -69,22 +74,12 @@ def create_production_app():
             if not update_dict:
                 return jsonify({'error': 'No data received'}), 400
             
-            # Process update asynchronously
+            # Hand the update to the persistent bot loop and return
+            # immediately; Telegram only needs the 200
             update = Update.de_json(update_dict, bot_instance.app.bot)
-            
-            # Run the update processing in a new event loop
-            def process_update():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    loop.run_until_complete(bot_instance.app.process_update(update))
-                except Exception as e:
-                    logging.error(f"Error processing update: {e}")
-                finally:
-                    loop.close()
-            
-            # Process in background thread to avoid blocking
-            threading.Thread(target=process_update, daemon=True).start()
+            asyncio.run_coroutine_threadsafe(
+                bot_instance.app.process_update(update), bot_loop
+            )
             
             return jsonify({'status': 'ok'}), 200
             
@@ -104,23 +99,15 @@ def create_production_app():
                 # Auto-generate webhook URL from Render
                 webhook_url = f"https://{os.environ.get('RENDER_EXTERNAL_HOSTNAME', 'localhost')}/webhook"
             
-            # Set webhook asynchronously
-            def set_webhook_async():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(
-                        bot_instance.app.bot.set_webhook(url=webhook_url)
-                    )
-                    print(f"✅ Webhook set to: {webhook_url}")
-                    return result
-                except Exception as e:
-                    print(f"❌ Webhook setup error: {e}")
-                    return False
-                finally:
-                    loop.close()
-            
-            result = set_webhook_async()
+            # Run on the persistent bot loop
+            try:
+                result = asyncio.run_coroutine_threadsafe(
+                    bot_instance.app.bot.set_webhook(url=webhook_url), bot_loop
+                ).result(timeout=30)
+                print(f"✅ Webhook set to: {webhook_url}")
+            except Exception as e:
+                print(f"❌ Webhook setup error: {e}")
+                result = False
             
             return jsonify({
                 'status': 'success' if result else 'error',
@@ -186,13 +173,19 @@ def main():
         print("🏥 Health check: /web-health")
         print("📋 System info: /system-info")
         
-        # Run Flask app
-        app.run(
-            host='0.0.0.0',
-            port=port,
-            debug=False,
-            threaded=True
-        )
+        # Serve with waitress when available; the Werkzeug dev server
+        # handles requests one at a time and is not meant for production
+        try:
+            from waitress import serve
+            serve(app, host='0.0.0.0', port=port, threads=8)
+        except ImportError:
+            logging.warning("waitress not installed; falling back to Flask dev server")
+            app.run(
+                host='0.0.0.0',
+                port=port,
+                debug=False,
+                threaded=True
+            )
         
     except Exception as e:
         print(f"❌ Error starting system: {e}")
@@ -7,11 +7,10 @@ Tests all major functionality including web interface, database, and bot API
 import requests
 import json
 import sys
-import os
 from datetime import datetime
 
-# Add current directory to Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No sys.path manipulation needed: the script's directory is already
+# first on sys.path.
 
 def test_web_health():
     """Test web interface health endpoint"""
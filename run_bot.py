@@ -5,12 +5,12 @@ Launcher for Telegram bot only
 """
 
 import sys
-import os
 import logging
 import asyncio
 
-# Add current directory to Python path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No sys.path manipulation needed: Python already puts the script's
+# directory first on sys.path, so the attendance_system package and
+# web_interface module resolve naturally.
 
 async def main_async():
     """Main async launcher function for bot only"""
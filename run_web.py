@@ -8,8 +8,9 @@ import sys
 import os
 import logging
 
-# Add current directory to Python path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No sys.path manipulation needed: Python already puts the script's
+# directory first on sys.path, so the attendance_system package and
+# web_interface module resolve naturally.
 
 def main():
     """Main launcher function for web interface only"""
@@ -31,12 +32,17 @@ def main():
         print(f"🔗 Access at: http://localhost:{port}")
         print("🔐 Admin Login: /login")
         
-        # Run Flask app
-        app.run(
-            host='0.0.0.0',
-            port=port,
-            debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-        )
+        if os.environ.get('FLASK_DEBUG', 'False').lower() == 'true':
+            # Debug requested: keep the dev server for its reloader
+            app.run(host='0.0.0.0', port=port, debug=True)
+        else:
+            try:
+                # Production WSGI server with a real thread pool; the
+                # dev server handles one request at a time
+                from waitress import serve
+                serve(app, host='0.0.0.0', port=port, threads=8)
+            except ImportError:
+                app.run(host='0.0.0.0', port=port)
         
     except KeyboardInterrupt:
         print("\n⚠️  Web interface stopped by user")
@@ -7,14 +7,9 @@ Compatible with the new modular architecture
 from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for, session
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
-import pandas as pd
+import csv
 import io
-import base64
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import pytz
 import os
 from functools import wraps
@@ -35,9 +30,32 @@ app.secret_key = os.environ.get('WEB_SECRET_KEY', 'mansoura-cih-attendance-secre
 config = Config()
 db = AttendanceDatabase()
 
+# Resolve the configured timezone once at import; every route needs it
+# and pytz.timezone() is a registry lookup plus tzinfo construction
+_TIMEZONE = pytz.timezone(config.TIMEZONE)
+
+# Fixed 9:30 AM lateness cutoff; parsing "09:30" per request through
+# strptime just re-derived this constant
+_LATE_CUTOFF = time(9, 30)
+
+
+# /web-health is polled by the platform every few seconds; the body
+# skeleton is constant, so only the timestamp is interpolated, the same
+# shape as the bot health service's /ping
+_WEB_HEALTH_BODY = '{"status": "healthy", "service": "web-interface", "timestamp": "%s"}'
+
+
+def _attendance_rate(checkins, total):
+    """Percentage of employees checked in, one decimal, safe on zero."""
+    return round(checkins * 100 / total, 1) if total else 0.0
+
 # Admin credentials
 ADMIN_USERNAME = os.environ.get('WEB_ADMIN_USER', 'admin')
-ADMIN_PASSWORD = os.environ.get('WEB_ADMIN_PASS', 'mansoura2024')
+# Hash once at startup so the plaintext is not kept around for
+# comparison and login checks run in constant time
+ADMIN_PASSWORD_HASH = generate_password_hash(
+    os.environ.get('WEB_ADMIN_PASS', 'mansoura2024')
+)
 
 def login_required(f):
     """Decorator to require login for admin routes"""
@@ -52,18 +70,16 @@ def login_required(f):
 def index():
     """Home page with dashboard overview"""
     try:
-        # Get basic stats
-        total_employees = len(db.get_all_employees())
-        today = datetime.now(pytz.timezone(config.TIMEZONE)).date()
+        today = datetime.now(_TIMEZONE).date()
         
-        # Get today's attendance records
-        today_records = [r for r in db.get_daily_attendance_records(today) if r['check_in_time']]
-        today_checkins = len(today_records)
+        counts = db.get_dashboard_stats(today)
+        total_employees = counts['total_employees']
+        today_checkins = counts['today_checkins']
         
         stats = {
             'total_employees': total_employees,
             'today_checkins': today_checkins,
-            'attendance_rate': round((today_checkins / total_employees * 100) if total_employees > 0 else 0, 1)
+            'attendance_rate': _attendance_rate(today_checkins, total_employees)
         }
         
         return render_template('dashboard.html', stats=stats)
@@ -77,7 +93,7 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+        if username == ADMIN_USERNAME and check_password_hash(ADMIN_PASSWORD_HASH, password):
             session['logged_in'] = True
             session['username'] = username
             flash('Successfully logged in!', 'success')
@@ -99,43 +115,18 @@ def logout():
 def admin_dashboard():
     """Admin dashboard with detailed analytics"""
     try:
-        egypt_tz = pytz.timezone(config.TIMEZONE)
-        today = datetime.now(egypt_tz).date()
-        
-        # Get all employees and today's records
-        all_employees = db.get_all_employees()
-        today_records = db.get_daily_attendance_records(today)
+        today = datetime.now(_TIMEZONE).date()
         
-        # Calculate stats
-        total_employees = len(all_employees)
-        today_checkins = len([r for r in today_records if r['check_in_time']])
-        today_checkouts = len([r for r in today_records if r['check_out_time']])
-        
-        # Get currently checked in employees
-        active_employees = len([r for r in today_records if r['check_in_time'] and not r['check_out_time']])
-        
-        # Calculate late employees (after 9:30 AM)
-        late_threshold = datetime.combine(today, datetime.strptime("09:30", "%H:%M").time())
-        late_threshold = egypt_tz.localize(late_threshold)
-        late_employees = 0
-        
-        for record in today_records:
-            if record['check_in_time']:
-                check_in_dt = datetime.fromisoformat(record['check_in_time'].replace('Z', '+00:00'))
-                if check_in_dt > late_threshold:
-                    late_employees += 1
-        
-        stats = {
-            'total_employees': total_employees,
-            'today_checkins': today_checkins,
-            'today_checkouts': today_checkouts,
-            'late_employees': late_employees,
-            'active_employees': active_employees,
-            'attendance_rate': round((today_checkins / total_employees * 100) if total_employees > 0 else 0, 1)
-        }
+        # All counters, including the 9:30 late count, come from one
+        # aggregate query instead of iterating every attendance row
+        stats = db.get_dashboard_stats(today)
+        total_employees = stats['total_employees']
+        stats['attendance_rate'] = _attendance_rate(
+            stats['today_checkins'], total_employees
+        )
         
-        # Get recent activity (last 10 records)
-        recent_activity = today_records[-10:] if today_records else []
+        # Get recent activity (newest 10 records, limited in SQL)
+        recent_activity = db.get_daily_attendance_records(today, limit=10)
         
         return render_template('admin_dashboard.html', stats=stats, recent_activity=recent_activity)
     except Exception as e:
@@ -177,29 +168,23 @@ def settings():
 def attendance_chart():
     """Generate attendance chart data"""
     try:
-        egypt_tz = pytz.timezone(config.TIMEZONE)
-        end_date = datetime.now(egypt_tz).date()
+        end_date = datetime.now(_TIMEZONE).date()
         start_date = end_date - timedelta(days=6)
         
-        chart_data = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            records = db.get_daily_attendance_records(current_date)
-            checkins = len([r for r in records if r['check_in_time']])
-            checkouts = len([r for r in records if r['check_out_time']])
-            
-            chart_data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'checkins': checkins,
-                'checkouts': checkouts
-            })
-            current_date += timedelta(days=1)
+        # One GROUP BY query for the whole week; backfill empty days
+        counts = db.get_attendance_counts_by_date(start_date, end_date)
+        dates, checkins, checkouts = [], [], []
+        for offset in range(7):
+            day = (start_date + timedelta(days=offset)).strftime('%Y-%m-%d')
+            day_counts = counts.get(day, (0, 0))
+            dates.append(day)
+            checkins.append(day_counts[0])
+            checkouts.append(day_counts[1])
         
         return jsonify({
-            'dates': [item['date'] for item in chart_data],
-            'checkins': [item['checkins'] for item in chart_data],
-            'checkouts': [item['checkouts'] for item in chart_data]
+            'dates': dates,
+            'checkins': checkins,
+            'checkouts': checkouts
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -209,8 +194,7 @@ def attendance_chart():
 def export_report(report_type):
     """Export reports as CSV"""
     try:
-        egypt_tz = pytz.timezone(config.TIMEZONE)
-        today = datetime.now(egypt_tz).date()
+        today = datetime.now(_TIMEZONE).date()
         
         if report_type == 'daily':
             date_str = request.args.get('date', today.strftime('%Y-%m-%d'))
@@ -225,16 +209,21 @@ def export_report(report_type):
         else:
             return jsonify({'error': 'Invalid report type'}), 400
         
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Create CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
+        # Write rows straight into the bytes buffer through a UTF-8
+        # wrapper so each row is encoded as it is produced, instead of
+        # materialising the whole CSV as a str and re-encoding it
+        buffer = io.BytesIO()
+        text_stream = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+        if data:
+            writer = csv.DictWriter(text_stream, fieldnames=list(data[0].keys()))
+            writer.writeheader()
+            writer.writerows(data)
+        text_stream.flush()
+        text_stream.detach()
+        buffer.seek(0)
         
         return send_file(
-            io.BytesIO(output.getvalue().encode()),
+            buffer,
             mimetype='text/csv',
             as_attachment=True,
             download_name=filename
@@ -248,15 +237,13 @@ def export_report(report_type):
 def toggle_admin(employee_id):
     """Toggle admin status for an employee"""
     try:
-        current_status = db.is_admin(employee_id)
+        is_now_admin = db.toggle_admin(employee_id)
+        if is_now_admin is None:
+            return jsonify({'error': 'Failed to toggle admin status'}), 500
+        
+        message = 'Admin status granted' if is_now_admin else 'Admin status revoked'
+        return jsonify({'success': True, 'message': message})
         
-        if current_status:
-            # Remove admin (if it's a method available)
-            return jsonify({'error': 'Remove admin function not implemented'}), 501
-        else:
-            db.add_admin(employee_id)
-            return jsonify({'success': True, 'message': 'Admin status granted'})
-            
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -265,25 +252,20 @@ def toggle_admin(employee_id):
 def get_stats():
     """Get real-time stats"""
     try:
-        egypt_tz = pytz.timezone(config.TIMEZONE)
-        today = datetime.now(egypt_tz).date()
-        
-        all_employees = db.get_all_employees()
-        today_records = db.get_daily_attendance_records(today)
-        
-        stats = {
-            'total_employees': len(all_employees),
-            'today_checkins': len([r for r in today_records if r['check_in_time']]),
-            'today_checkouts': len([r for r in today_records if r['check_out_time']]),
-            'active_employees': len([r for r in today_records if r['check_in_time'] and not r['check_out_time']])
-        }
+        today = datetime.now(_TIMEZONE).date()
         
-        stats['attendance_rate'] = round(
-            (stats['today_checkins'] / stats['total_employees'] * 100) 
-            if stats['total_employees'] > 0 else 0, 1
+        stats = db.get_dashboard_stats(today)
+        stats.pop('late_employees')
+        stats['attendance_rate'] = _attendance_rate(
+            stats['today_checkins'], stats['total_employees']
         )
         
-        return jsonify(stats)
+        # Polled endpoint: skip jsonify's pretty separators and emit the
+        # compact form directly
+        return app.response_class(
+            json.dumps(stats, separators=(',', ':')),
+            mimetype='application/json'
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -291,11 +273,10 @@ def get_stats():
 @app.route('/web-health')
 def web_health():
     """Web interface health check"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'web-interface',
-        'timestamp': datetime.now(pytz.timezone(config.TIMEZONE)).isoformat()
-    })
+    return app.response_class(
+        _WEB_HEALTH_BODY % datetime.now(_TIMEZONE).isoformat(),
+        mimetype='application/json'
+    )
 
 if __name__ == '__main__':
     print("🌐 Starting El Mansoura CIH Web Interface...")
@@ -304,9 +285,15 @@ if __name__ == '__main__':
     print("🔐 Admin Login: /login")
     print("=" * 50)
     
-    # Run Flask app
-    app.run(
-        host='0.0.0.0', 
-        port=int(os.environ.get('PORT', 5000)),
-        debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    ) 
\ No newline at end of file
+    port = int(os.environ.get('PORT', 5000))
+    if os.environ.get('FLASK_DEBUG', 'False').lower() == 'true':
+        # Debug requested: keep the dev server for its reloader
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        try:
+            # Production WSGI server with a real thread pool; the dev
+            # server handles one request at a time
+            from waitress import serve
+            serve(app, host='0.0.0.0', port=port, threads=8)
+        except ImportError:
+            app.run(host='0.0.0.0', port=port) 
\ No newline at end of file